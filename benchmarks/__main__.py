@@ -0,0 +1,55 @@
+import argparse
+import json
+import sys
+
+from benchmarks.suite import SIZES, compare, run
+
+
+def main(argv = None):
+    """
+    Function that runs the benchmark suite, or compares two of its reports.
+    "run" writes a report of every metric for the chosen sizes, and "compare" flags the metrics of a report that regressed from a baseline beyond a threshold.
+    :param argv: Command line arguments, or None for sys.argv.
+    :return: Exit code, 1 if compare finds a regression.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark suite of DRACS.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Runs the benchmarks and writes their report as JSON.")
+    run_parser.add_argument("--sizes", nargs="+", choices=list(SIZES), help="Sizes of the game to benchmark, every size by default.")
+    run_parser.add_argument("--games", type=int, default=200, help="Number of games played per pairing.")
+    run_parser.add_argument("--training-games", type=int, default=2000, help="Number of games played to generate the data set.")
+    run_parser.add_argument("--output", help="Path of the report, written to the standard output if not given.")
+    compare_parser = subparsers.add_parser("compare", help="Compares a report to a baseline and flags the regressions.")
+    compare_parser.add_argument("baseline", help="Path of the baseline report, e.g. benchmarks/baselines/default.json.")
+    compare_parser.add_argument("current", help="Path of the report to judge.")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Relative change tolerated before a metric is flagged, 0.1 for 10%%.")
+    args = parser.parse_args(argv)
+
+    match args.command:
+        case "run":
+            report = run(args.sizes, args.games, args.training_games)
+            if args.output:
+                with open(args.output, "w") as file:
+                    json.dump(report, file, indent=2)
+            else:
+                print(json.dumps(report, indent=2))
+            return 0
+        case "compare":
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+            with open(args.current) as file:
+                current = json.load(file)
+            rows = compare(baseline, current, args.threshold)
+            for size, metric, reference, value, change, regression in rows:
+                if value is None:
+                    print(f"{'MISSING':10s} {size:8s} {metric:36s} {reference:14.3f}")
+                else:
+                    print(f"{'REGRESSION' if regression else 'ok':10s} {size:8s} {metric:36s} {reference:14.3f} {value:14.3f} {change:+8.1%}")
+            regressions = sum(row[5] for row in rows)
+            print(f"{regressions} regression(s) beyond {args.threshold:.0%} or missing out of {len(rows)} metrics.")
+            return 1 if regressions else 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import argparse
+import os
+import subprocess
+import sys
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "game")
+HEAVY_MODULES = ["sklearn", "pandas", "scipy", "joblib", "concurrent.futures.process"] # Only needed once an ML model is created, loaded or trained
+
+# Starts the game as "python game/main.py" would, then plays a Random vs Simple match, which must not load any heavy module.
+MATCH = """
+import sys
+import main
+from computer import Computer
+from game import Game
+main.cfg.set_config(action_viewer = False)
+Game(main.cfg, Computer(main.cfg, "RANDOM"), Computer(main.cfg, "SIMPLE"))
+print(",".join(name for name in {heavy} if name in sys.modules))
+"""
+
+
+def game_modules():
+    """
+    Function that lists the modules of the game, one per Python file of the game directory.
+    :return: Set of the module names of the game.
+    """
+    return {name[:-3] for name in os.listdir(GAME_DIR) if name.endswith(".py")}
+
+
+def import_times(code):
+    """
+    Function that runs code in a fresh interpreter with -X importtime, and reads the time spent importing every module.
+    The time of the game is the cumulative time of the modules of the game imported at top level, less the time of numpy imported under them. The startup of the interpreter (site, encodings) is left out.
+    :param code: Python code to run, from the game directory.
+    :return: Tuple of the total import time, of the import time of numpy and of the import time of the game, in microseconds, and the standard output of the code.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=GAME_DIR, capture_output=True, text=True, check=True)
+    own_modules = game_modules()
+    total, numpy_time, game_time, nested_numpy = 0, 0, 0, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == "numpy":
+            numpy_time = int(cumulative)
+            nested_numpy = numpy_time if name.startswith("  ") else 0
+        if not name.startswith("  "): # Top-level imports only, the nested imports being included in their cumulative time
+            total += int(cumulative)
+            if name.strip() in own_modules:
+                game_time += int(cumulative) - nested_numpy
+            nested_numpy = 0 # Nested imports are listed before the top-level import that holds them
+    return total, numpy_time, game_time, result.stdout.strip()
+
+
+def main(argv = None):
+    """
+    Function that measures the import time of the game and checks it against a budget, from the median of several fresh interpreters. numpy, which every game needs, and the startup of the interpreter are reported apart from the imports of the game.
+    :param argv: Command line arguments, or None for sys.argv.
+    :return: Exit code, 1 if the budget is exceeded or a heavy module is loaded by a Random vs Simple match.
+    """
+    parser = argparse.ArgumentParser(description="Import time regression benchmark of DRACS.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters measured.")
+    parser.add_argument("--budget", type=float, default=100.0, help="Budget in ms of the imports of the game, numpy excluded.")
+    args = parser.parse_args(argv)
+
+    totals, numpy_times, game_times = [], [], []
+    for _ in range(args.repeat):
+        total, numpy_time, game_time, loaded = import_times(MATCH.format(heavy=HEAVY_MODULES))
+        totals.append(total / 1000)
+        numpy_times.append(numpy_time / 1000)
+        game_times.append(game_time / 1000)
+    total = sorted(totals)[len(totals) // 2]
+    numpy_time = sorted(numpy_times)[len(numpy_times) // 2]
+    own = sorted(game_times)[len(game_times) // 2]
+    print(f"Import time: {total:.1f} ms (numpy {numpy_time:.1f} ms, game {own:.1f} ms, budget {args.budget:.1f} ms)")
+
+    failed = False
+    if own > args.budget:
+        print(f"Import time of the game is over budget by {own - args.budget:.1f} ms.")
+        failed = True
+    if loaded:
+        print(f"Heavy modules loaded by a Random vs Simple match: {loaded}")
+        failed = True
+    return 1 if failed else 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
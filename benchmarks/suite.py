@@ -0,0 +1,211 @@
+import contextlib
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.importtime import GAME_DIR, MATCH, HEAVY_MODULES, import_times
+
+sys.path.insert(0, GAME_DIR) # The game is made of flat modules, imported as main.py imports them
+
+from computer import Computer
+from config import Config
+from dataset import compact, load_binary
+from engine import BatchGame
+from game import Game
+from registry import REGISTRY
+from runner import generate_training_data
+
+# Sizes of the game benchmarked, from the smallest tables and windows to the largest.
+SIZES = {
+    "small": {"k": 2, "max_health_points": 3, "max_mana_points": 2},
+    "default": {"k": 3, "max_health_points": 5, "max_mana_points": 3},
+    "large": {"k": 5, "max_health_points": 8, "max_mana_points": 4},
+}
+MODELS = ["RANDOM", "SIMPLE", "ADAPTIVE", "STRATEGIST", "GBC"] # AI models whose moves are timed, each playing player 2 against Simple
+
+
+def percentiles(samples):
+    """
+    Function that summarizes latencies by their percentiles.
+    :param samples: Latencies in nanoseconds.
+    :return: Tuple of the 50th and 99th percentiles in microseconds.
+    """
+    p50, p99 = np.percentile(np.asarray(samples, dtype=np.float64), [50, 99])
+    return float(p50) / 1e3, float(p99) / 1e3
+
+
+class TimedComputer(Computer):
+    """
+    Class TimedComputer, which records the latency of every move of a Computer. Computers have no per-instance dictionary, so the play method is overridden in a subclass rather than on the instance.
+    """
+    __slots__ = ("latencies",)
+
+    def __init__(self, cfg, name, latencies):
+        self.latencies = latencies # List receiving the latency of every move in nanoseconds
+        super().__init__(cfg, name)
+
+
+    def play(self, *args):
+        start = time.perf_counter_ns()
+        action = super().play(*args)
+        self.latencies.append(time.perf_counter_ns() - start)
+        return action
+
+
+def bench_dataset(cfg, training_games, results):
+    """
+    Function that measures the write and read throughput of the binary data set, and the training time of the GBC model.
+    :param cfg: Object of the class Config.
+    :param training_games: Number of games played to generate the data set.
+    :param results: Dictionary receiving the metrics.
+    :return: Nothing.
+    """
+    start = time.perf_counter()
+    generate_training_data(cfg, ["RANDOM", "SIMPLE"], ["SIMPLE_2", "RANDOM_2"], training_games, 1, 0)
+    write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    features, labels = load_binary(cfg)
+    compact(features, labels)
+    read = time.perf_counter() - start
+    rows = labels.shape[0]
+    results["dataset_rows"] = rows
+    results["dataset_write_rows_per_s"] = rows / write
+    results["dataset_read_rows_per_s"] = rows / read # Memory-mapped load and compaction, as before every training
+
+    from trainer import train_gbc
+
+    start = time.perf_counter()
+    train_gbc(cfg)
+    results["gbc_train_s_per_10k_rows"] = (time.perf_counter() - start) / rows * 10000
+
+
+def bench_models(cfg, results):
+    """
+    Function that measures the time to create, save and load every model stored on disk, and the cost of one partial_fit of the Adaptive model.
+    :param cfg: Object of the class Config.
+    :param results: Dictionary receiving the metrics.
+    :return: Nothing.
+    """
+    start = time.perf_counter()
+    Computer(cfg, "STRATEGIST")
+    results["strategist_solve_s"] = time.perf_counter() - start
+    REGISTRY.put(cfg, "ADAPTIVE", Computer(cfg, "ADAPTIVE").clf)
+    for model_name in ("ADAPTIVE", "STRATEGIST", "GBC"):
+        REGISTRY.get(cfg, model_name)
+        start = time.perf_counter()
+        REGISTRY.dump(cfg, model_name)
+        results[f"{model_name.lower()}_save_ms"] = (time.perf_counter() - start) * 1e3
+        REGISTRY.clear()
+        start = time.perf_counter()
+        REGISTRY.get(cfg, model_name)
+        results[f"{model_name.lower()}_load_ms"] = (time.perf_counter() - start) * 1e3
+
+    computer = Computer(cfg, "ADAPTIVE")
+    features, _ = load_binary(cfg)
+    rows = np.asarray(features[:500], dtype=np.float32)
+    labels = np.random.randint(0, 5, rows.shape[0])
+    latencies = []
+    for i in range(rows.shape[0]):
+        start = time.perf_counter_ns()
+        computer.fit(rows[i:i + 1], labels[i:i + 1])
+        latencies.append(time.perf_counter_ns() - start)
+    results["partial_fit_p50_us"], results["partial_fit_p99_us"] = percentiles(latencies)
+
+
+def bench_games(cfg, game_number, results):
+    """
+    Function that measures the games per second of every pairing against Simple, with the latency percentiles of the moves of the model, and of the batch engine.
+    :param cfg: Object of the class Config.
+    :param game_number: Number of games played per pairing.
+    :param results: Dictionary receiving the metrics.
+    :return: Nothing.
+    """
+    start = time.perf_counter()
+    BatchGame(cfg, "RANDOM", "SIMPLE", game_number * 10, seed=0).run()
+    results["games_per_s_RANDOM_SIMPLE_batch"] = game_number * 10 / (time.perf_counter() - start)
+
+    for model_name in MODELS:
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(game_number):
+            Game(cfg, Computer(cfg, "SIMPLE"), TimedComputer(cfg, model_name, latencies))
+        results[f"games_per_s_SIMPLE_{model_name}"] = game_number / (time.perf_counter() - start)
+        results[f"move_{model_name}_p50_us"], results[f"move_{model_name}_p99_us"] = percentiles(latencies)
+
+
+def run_size(overrides, game_number, training_games):
+    """
+    Function that runs every benchmark for one size of the game, in a temporary directory holding its own data set and models.
+    :param overrides: Fields of the Config defining the size.
+    :param game_number: Number of games played per pairing.
+    :param training_games: Number of games played to generate the data set.
+    :return: Dictionary of the metrics.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cfg = Config(action_viewer=False, models_dir=Path(directory) / "models", data_dir=Path(directory) / "data", checkpoint_mode="OFF", **overrides)
+        os.makedirs(cfg.models_dir)
+        REGISTRY.clear()
+        random.seed(0)
+        np.random.seed(0)
+        bench_dataset(cfg, training_games, results)
+        bench_models(cfg, results)
+        bench_games(cfg, game_number, results)
+        REGISTRY.clear()
+    return results
+
+
+def run(sizes = None, game_number = 200, training_games = 2000):
+    """
+    Function that runs the benchmark suite.
+    :param sizes: Names of the sizes of SIZES to benchmark, or None for every size.
+    :param game_number: Number of games played per pairing.
+    :param training_games: Number of games played to generate the data set.
+    :return: Dictionary of the environment, the settings, and the metrics of the startup and of every size.
+    """
+    import sklearn
+
+    startup = [import_times(MATCH.format(heavy=HEAVY_MODULES)) for _ in range(3)]
+    report = {"environment": {"python": platform.python_version(), "numpy": np.__version__, "sklearn": sklearn.__version__, "machine": platform.machine(), "cpus": os.cpu_count(),
+                              "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+              "settings": {"games": game_number, "training_games": training_games},
+              "results": {"startup": {"import_ms": sorted(total for total, _, _, _ in startup)[1] / 1e3,
+                                          "game_import_ms": sorted(game_time for _, _, game_time, _ in startup)[1] / 1e3}}}
+    for name in sizes if sizes is not None else SIZES:
+        print(f"Benchmarking {name} ({SIZES[name]})", file=sys.stderr)
+        with contextlib.redirect_stdout(sys.stderr): # Progress messages of the game stay out of the results
+            report["results"][name] = run_size(SIZES[name], game_number, training_games)
+    return report
+
+
+def compare(baseline, current, threshold = 0.1):
+    """
+    Function that compares the metrics of two runs of the suite. Throughputs (metrics ending in _per_s) regress when they fall, and times when they rise, by more than the threshold.
+    A metric (or a whole size) of the baseline missing from the current run is reported as a regression, so a benchmark that stops running is not passed silently.
+    :param baseline: Report of the reference run.
+    :param current: Report of the run to judge.
+    :param threshold: Relative change tolerated, 0.1 for 10%.
+    :return: List of (size, metric, baseline value, current value, relative change, regression) for every metric of the baseline, the current value and the change being None for a missing metric.
+    """
+    rows = []
+    for size, metrics in baseline["results"].items():
+        for metric, reference in metrics.items():
+            if metric == "dataset_rows":
+                continue
+            value = current["results"].get(size, {}).get(metric)
+            if value is None:
+                rows.append((size, metric, reference, None, None, True))
+                continue
+            if reference == 0:
+                continue
+            change = (value - reference) / reference
+            worse = -change if metric.endswith("_per_s") else change
+            rows.append((size, metric, reference, value, change, worse > threshold))
+    return rows
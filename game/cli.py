@@ -0,0 +1,171 @@
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+import instrument
+import main
+from tournament import MODELS, Tournament
+
+CONFIG_ARGUMENTS = {"hp": "max_health_points", "mp": "max_mana_points", "turns": "max_num_turns", "k": "k", "seed": "base_seed", "workers": "workers",
+                    "pool_size": "pool_size", "chunk_size": "chunk_size", "training_games": "training_games", "adaptive_games": "adaptive_training_games",
+                    "stop": "early_stop", "ci_width": "stop_ci_width", "sprt_delta": "stop_sprt_delta", "stop_batch": "stop_batch"} # Arguments overriding a field of the Config
+
+
+class MissingModelError(Exception):
+    """
+    Exception raised when an AI model of a run does not exist and cannot be generated without training. The command line never prompts, so the run stops instead.
+    """
+    pass
+
+
+
+def build_parser():
+    """
+    Function that builds the parser of the command line interface, with one subcommand per non-interactive run.
+    :return: The argument parser.
+    """
+    parser = argparse.ArgumentParser(prog="python game/main.py", description="Runs DRACS without prompts, and writes the results as JSON.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--hp", type=int, help="Maximum health points of a player.")
+    common.add_argument("--mp", type=int, help="Maximum mana points of a player.")
+    common.add_argument("--turns", type=int, help="Maximum number of turns of a game.")
+    common.add_argument("--k", type=int, help="History window of the ML models.")
+    common.add_argument("--seed", type=int, help="Base seed of the games, for reproducible runs.")
+    common.add_argument("--workers", type=int, help="Number of worker processes.")
+    common.add_argument("--pool-size", type=int, help="Number of games advanced together when an ML model plays.")
+    common.add_argument("--chunk-size", type=int, help="Number of games sent to a worker at once.")
+    common.add_argument("--stop", type=str.upper, choices=["OFF", "CI", "SPRT"], help="Stops a pairing early once its result is precise enough (matches and assessments).")
+    common.add_argument("--ci-width", type=float, help="Width of the 95%% intervals at which --stop CI stops a pairing.")
+    common.add_argument("--sprt-delta", type=float, help="Distance from a win rate of 0.5 tested by --stop SPRT.")
+    common.add_argument("--stop-batch", type=int, help="Number of games played between two checks of the early stop.")
+    common.add_argument("--instrument", help="Times the phases of the games, including in the workers, and writes them to this path (Prometheus text format if it ends with .prom, JSON otherwise).")
+    common.add_argument("--output", help="Path of the JSON results, written to the standard output if not given.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    match_parser = subparsers.add_parser("match", parents=[common], help="Plays a series of games between two AI models.")
+    match_parser.add_argument("p1", type=str.upper, choices=MODELS, help="AI model of player 1.")
+    match_parser.add_argument("p2", type=str.upper, choices=MODELS, help="AI model of player 2.")
+    match_parser.add_argument("--games", type=int, default=100, help="Number of games to play.")
+
+    assess_parser = subparsers.add_parser("assess", parents=[common], help="Plays the pairings of the Predictive Algorithm Assessment.")
+    assess_parser.add_argument("--games", type=int, default=100, help="Number of games to play per pairing.")
+
+    tournament_parser = subparsers.add_parser("tournament", parents=[common], help="Plays every ordered pair of AI models and rates them, reusing the cached pairings.")
+    tournament_parser.add_argument("--models", type=str.upper, nargs="+", choices=MODELS, default=MODELS, help="AI models of the tournament.")
+    tournament_parser.add_argument("--games", type=int, default=100, help="Number of games to play per pairing.")
+    tournament_parser.add_argument("--k-factor", type=float, default=16.0, help="Largest change of Elo rating of a single game.")
+    tournament_parser.add_argument("--cache", help="Path of the cached pairings, in the data directory by default.")
+
+    train_parser = subparsers.add_parser("train", parents=[common], help="Trains the Adaptive model, and the GBC model with --gbc.")
+    train_parser.add_argument("--gbc", action="store_true", help="Generates the training set and trains the GBC model.")
+    train_parser.add_argument("--training-games", type=int, help="Number of games played to generate the training set of the GBC model.")
+    train_parser.add_argument("--adaptive-games", type=int, help="Number of games played to train the Adaptive model.")
+    return parser
+
+
+def configure(args):
+    """
+    Function that applies the arguments of the command line to the configuration of the game. Actions are never displayed.
+    :param args: Parsed arguments.
+    :return: Dictionary of the configuration used by the run.
+    """
+    overrides = {field: getattr(args, name) for name, field in CONFIG_ARGUMENTS.items() if getattr(args, name, None) is not None}
+    main.cfg.set_config(action_viewer=False, **overrides)
+    return {"max_health_points": main.cfg.max_health_points, "max_mana_points": main.cfg.max_mana_points, "max_num_turns": main.cfg.max_num_turns, "k": main.cfg.k,
+            "base_seed": main.cfg.base_seed, "workers": main.cfg.workers}
+
+
+def require_models(*model_names):
+    """
+    Function that checks that the AI models of a run exist, or can be generated from the data set (GBC) or solved (Strategist).
+    :param model_names: Core names of the AI models.
+    :return: Nothing.
+    :raises: MissingModelError if a model requires training.
+    """
+    for model_name in model_names:
+        if model_name in {"ADAPTIVE", "GBC"} and not main.cfg.query_existence(model_name):
+            flag = " --gbc" if model_name == "GBC" else ""
+            raise MissingModelError(f"{model_name} does not exist, please train the model first with: python game/main.py train{flag}")
+
+
+def match_result(cpu_name_p1, cpu_name_p2, game_number):
+    """
+    Function that plays a series of games between two AI models and summarizes them.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2.
+    :param game_number: Number of games to play.
+    :return: Dictionary of the results, i.e., the wins of each player, the ties, the predictions made by player 2, and the games saved by the early stop if it is on.
+    """
+    start = time.perf_counter()
+    winners, prediction, stop = main.play_series(cpu_name_p1, cpu_name_p2, game_number)
+    predictions = prediction[0] + prediction[1]
+    result = {"p1": cpu_name_p1, "p2": cpu_name_p2, "games": len(winners),
+            "wins_p1": winners.count(1), "wins_p2": winners.count(2), "ties": winners.count(0),
+            "win_rate_p1": winners.count(1) / len(winners), "win_rate_p2": winners.count(2) / len(winners),
+            "correct_predictions_p2": prediction[0], "incorrect_predictions_p2": prediction[1],
+            "prediction_accuracy_p2": prediction[0] / predictions if predictions else None,
+            "seconds": time.perf_counter() - start}
+    if stop is not None:
+        result.update(stop)
+    return result
+
+
+def run(args):
+    """
+    Function that runs the subcommand of the command line.
+    :param args: Parsed arguments.
+    :return: Dictionary of the results of the run.
+    """
+    results = {"command": args.command, "config": configure(args)}
+    match args.command:
+        case "match":
+            require_models(args.p1, args.p2)
+            results["matches"] = [match_result(args.p1, args.p2, max(args.games, 1))]
+        case "assess":
+            require_models("ADAPTIVE", "GBC")
+            results["matches"] = [match_result(cpu_name_p1, cpu_name_p2, max(args.games, 1)) for cpu_name_p1, cpu_name_p2 in main.ASSESS_PAIRINGS]
+        case "tournament":
+            require_models(*args.models)
+            tournament = Tournament(main.cfg, args.models, max(args.games, 1), main.cfg.base_seed or 0, args.k_factor, args.cache)
+            results.update(tournament.run(main.cfg.workers, main.cfg.chunk_size))
+        case "train":
+            start = time.perf_counter()
+            main.train_models(args.gbc)
+            results["trained"] = ["ADAPTIVE", "GBC"] if args.gbc else ["ADAPTIVE"]
+            results["seconds"] = time.perf_counter() - start
+    return results
+
+
+def cli(argv = None):
+    """
+    Function that runs DRACS from the command line without any prompt. Progress messages are written to the standard error, so the standard output only holds the JSON results.
+    :param argv: Command line arguments, or None for sys.argv.
+    :return: Exit code, 0 on success and 2 if a model requires training.
+    """
+    args = build_parser().parse_args(argv)
+    if args.instrument:
+        instrument.enable()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run(args)
+    except MissingModelError as e:
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        main.REGISTRY.flush()
+        if args.instrument:
+            instrument.export(args.instrument)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(cli())
@@ -1,31 +1,40 @@
-import joblib
+import copy
 import numpy as np
-import os
-import pandas as pd
 import random
 import warnings
 
 warnings.filterwarnings("ignore", category=RuntimeWarning, module=r"sklearn\.linear_model") # Warning suppression for overly confident prediction
 
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.linear_model import SGDClassifier
-from sklearn.model_selection import train_test_split
 
+from inference import LinearPredictor, TreeEnsemblePredictor
 from player import Player
+from registry import REGISTRY
+from rules import expected_value_table, state_codec, transition_table
+from replay import ReplayBuffer
+from search import Search
 
 ACTIONS = ["Attack","Defend","Rest","Counter","Steal"] # List to display the action taken by the AI model
 
 
 class Computer(Player):
+    __slots__ = ("action_viewer", "k", "clf", "predictor", "path", "policy", "search", "replay", "rounds_played", "predict", "features", "transitions", "feature_cols", "codec")
+
     def __init__(self, cfg, name):
         super().__init__(cfg,name)
         self.action_viewer = cfg.action_viewer
         self.k = cfg.k
         self.clf = None
+        self.predictor = None
         self.path = None
+        self.policy = None
+        self.search = None
+        self.replay = None
+        self.rounds_played = 0 # Rounds played by the Strategist model, which follows a policy depending on the rounds remaining
+        self.codec = state_codec(cfg.max_health_points, cfg.max_mana_points)
         self.classifier_model(self.k)
         self.predict = 0
         self.features = None
+        self.transitions = transition_table(cfg.max_health_points, cfg.max_mana_points)
 
     def print_action(self, action):
         """
@@ -50,65 +59,62 @@ class Computer(Player):
                 pass
             case "RANDOM_2": # Used for training purposes
                 self.name = "RANDOM"
-                self.path = self.cfg.model_query("ADAPTIVE")
-                if os.path.exists(self.path):
-                    self.clf = joblib.load(self.path)
-                    if self.action_viewer: print("Model loaded")
-                else:
-                    self.clf = SGDClassifier(loss="log_loss", random_state=42)
-                    X0 = np.zeros((5, 10 * k+2+(self.cfg.max_mana_points+1)*2), dtype=np.float32)
-                    y0 = np.array([0, 1, 2, 3, 4])
-                    self.clf.partial_fit(X0, y0, classes=np.array([0, 1, 2, 3, 4]))
+                self.adaptive_model(k)
             case "SIMPLE_2": # Used for training purposes
                 self.name = "SIMPLE"
-                self.path = self.cfg.model_query("ADAPTIVE")
-                if os.path.exists(self.path):
-                    self.clf = joblib.load(self.path)
-                    if self.action_viewer: print("Model loaded")
-                else:
-                    self.clf = SGDClassifier(loss="log_loss", random_state=42)
-                    X0 = np.zeros((5, 10 * k+2+(self.cfg.max_mana_points+1)*2), dtype=np.float32)
-                    y0 = np.array([0, 1, 2, 3, 4])
-                    self.clf.partial_fit(X0, y0, classes=np.array([0, 1, 2, 3, 4]))
+                self.adaptive_model(k)
             case "ADAPTIVE": # Adaptive model (Stochastic Gradient Classifier)
-                self.path = self.cfg.model_query("ADAPTIVE")
-                if self.action_viewer: print(self.path)
-                if os.path.exists(self.path):
-                    self.clf = joblib.load(self.path)
-                    if self.action_viewer: print("Model loaded")
-                else:
-                    self.clf = SGDClassifier(loss="log_loss", random_state=42)
-                    X0 = np.zeros((5, 10 * k+2+(self.cfg.max_mana_points+1)*2), dtype=np.float32)
-                    y0 = np.array([0, 1, 2, 3, 4])
-                    self.clf.partial_fit(X0, y0, classes=np.array([0, 1, 2, 3, 4]))
-                pass
-            case "STRATEGIST": #TODO Reinforced Learning Algorithm
-                pass
+                if self.action_viewer: print(self.cfg.model_query("ADAPTIVE"))
+                self.adaptive_model(k)
+            case "STRATEGIST": # Strategist model (exact equilibrium policy solved by backward induction)
+                self.path = self.cfg.model_query("STRATEGIST")
+                bundle = REGISTRY.get(self.cfg, "STRATEGIST")
+                if bundle is None or bundle["turns"] != self.cfg.max_num_turns: # The model signature does not include the number of turns
+                    from strategist import solve # scipy is only loaded to solve the policy
+
+                    print("Solving Strategist policy. Please wait...")
+                    bundle = solve(self.cfg.max_health_points, self.cfg.max_mana_points, self.cfg.max_num_turns)
+                    REGISTRY.put(self.cfg, "STRATEGIST", bundle)
+                    REGISTRY.dump(self.cfg, "STRATEGIST")
+                self.policy = self.codec.flat(bundle["policy"], turns=True) # One row of (player number, action) per code of the state and rounds remaining
+                if self.action_viewer: print("Model loaded")
             case "GBC": # Gradient Boosting Classifier model
                 self.path = self.cfg.model_query("GBC")
-                if os.path.exists(self.path):
-                    bundle = joblib.load(self.path)
-                    self.clf = bundle["model"]
-                    self.feature_cols = bundle["feature_cols"]
-                    if self.action_viewer: print("Model loaded")
-                else: # Creating the model if the model does not exist, but the data does.
-                    print("Creating Model. Please wait...")
-                    df = pd.read_csv(self.cfg.data_query())
-                    FEATURE_COLS = df.columns.drop("label").tolist()
-                    X = df[FEATURE_COLS]
-                    y = df["label"]
+                bundle = REGISTRY.get(self.cfg, "GBC")
+                if bundle is None: # Creating the model if the model does not exist, but the data does.
+                    from trainer import train_gbc # sklearn is only loaded to train the model
 
-                    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
-                    gbc = GradientBoostingClassifier(random_state=42)
-                    gbc.fit(X_tr, y_tr)
+                    bundle = train_gbc(self.cfg)
+                self.clf = bundle["model"]
+                self.feature_cols = bundle["feature_cols"]
+                self.predictor = REGISTRY.compiled(self.cfg, "GBC", lambda gbc_bundle: TreeEnsemblePredictor(gbc_bundle["model"])) # Compiled once per loaded bundle, shared by every GBC Computer
+                if self.cfg.search_depth > 0: self.search = Search(self.cfg, self.predictor)
+                if self.action_viewer: print("Model loaded")
 
-                    joblib.dump({"model": gbc, "feature_cols": FEATURE_COLS}, self.path)
 
-                    bundle = joblib.load(self.path)
+    def adaptive_model(self, k = 3):
+        """
+        Function to acquire the Adaptive model from the model registry, or to generate a new model if it does not exist yet.
+        The Computer learns on its own copy of the shared model, which is stored back in the registry when saved at the end of the game.
+        :param k: History Window k corresponding to the previous rounds taken into consideration. Default is 3. Overwriten by call.
+        :return: Nothing.
+        """
+        self.path = self.cfg.model_query("ADAPTIVE")
+        clf = REGISTRY.get(self.cfg, "ADAPTIVE")
+        if clf is not None:
+            self.clf = copy.deepcopy(clf)
+            if self.action_viewer: print("Model loaded")
+        else:
+            from sklearn.linear_model import SGDClassifier # Only loaded to create the model, so games without ML models start fast
 
-                    self.clf = bundle["model"]
-                    self.feature_cols = bundle["feature_cols"]
-                    if self.action_viewer: print("Model loaded")
+            self.clf = SGDClassifier(loss="log_loss", random_state=42)
+            X0 = np.zeros((5, 10 * k+2+(self.cfg.max_mana_points+1)*2), dtype=np.float32)
+            y0 = np.array([0, 1, 2, 3, 4])
+            self.clf.partial_fit(X0, y0, classes=np.array([0, 1, 2, 3, 4]))
+        self.predictor = LinearPredictor(self.clf)
+        if self.cfg.search_depth > 0: self.search = Search(self.cfg, self.predictor)
+        if self.cfg.replay_flush > 1: # Otherwise every round is learned immediately
+            self.replay = ReplayBuffer(max(self.cfg.replay_capacity, self.cfg.replay_flush), self.clf.coef_.shape[1], self.cfg.replay_sampling)
 
 
     def play(self, action_state_window, current_state, player_number):
@@ -126,8 +132,8 @@ class Computer(Player):
                 return self.simple_action(current_state, player_number)
             case "ADAPTIVE":
                 return self.adaptive_action(action_state_window, current_state, player_number)
-            case "STRATEGIST": #TODO Future RL Algorithm
-                pass
+            case "STRATEGIST":
+                return self.strategist_action(current_state, player_number)
             case "GBC":
                 return self.gbc_action(action_state_window, current_state, player_number)
 
@@ -185,8 +191,19 @@ class Computer(Player):
         """
         if current_state[0] == 0 or current_state[1] == 0: # Ensures that the model does not continue to play when the game is over.
             raise RuntimeError(f"Was going to calculate when {current_state[0]} or {current_state[1]} is zero\n{current_state}")
-        probs = self.clf.predict_proba(action_state_window)[0] # Probabilities of actions taken by the opponent. With the highest value corresponding to the most likely action to be taken.
+        probs = self.predictor.predict_proba(action_state_window)[0] # Probabilities of actions taken by the opponent. With the highest value corresponding to the most likely action to be taken.
+        return self.predicted_decision(probs, current_state, player_number, action_state_window)
 
+
+    def predicted_decision(self, probs, current_state, player_number, action_state_window = None):
+        """
+        Function that decides on the action of an ML model (Adaptive or GBC) from its predicted probabilities of the opponent's actions. Separated from the prediction so that the probabilities can be computed for many games at once.
+        :param probs: Probabilities of each action being taken by the opponent.
+        :param current_state: Current state of the player's (i.e., hp and mp).
+        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
+        :param action_state_window: List containing the action history of the previous k rounds and the state of the players, used by the search when enabled.
+        :return: The integer corresponding to the action that the AI model plays, from 1 to 5.
+        """
         # Masks impossible actions depending on mana state of opponent, such as counter of steal.
         if current_state[3-player_number] < 1:
             probs[3] = 0
@@ -204,6 +221,11 @@ class Computer(Player):
         # Takes the most likely predicted action adds 1 to make it an integer from 1 to 5 and sends it to separate function to calculate best action to take.
         pred_action = int(np.argmax(probs)) + 1
         self.predict = pred_action
+        if self.search is not None and action_state_window is not None: # Looks several rounds ahead, weighting every action of the opponent by its probability
+            best_action = self.search.best_action(action_state_window, probs, current_state, player_number)
+            self.print_action(best_action)
+            self.action_cost(best_action)
+            return best_action
         return self.decision(pred_action, current_state, player_number)
 
 
@@ -250,6 +272,22 @@ class Computer(Player):
             return selected_action[0]
 
 
+    def strategist_action(self, current_state, player_number):
+        """
+        Function for Strategist AI model, sampling its action from the equilibrium policy of the current state and number of rounds remaining.
+        :param current_state: Current state of the player's (i.e., hp and mp).
+        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
+        :return: The integer corresponding to the action that the AI model plays, from 1 to 5.
+        """
+        rounds = max(self.cfg.max_num_turns - self.rounds_played, 1)
+        self.rounds_played += 1
+        probs = self.policy[self.codec.pack(current_state, rounds), player_number]
+        action = random.choices(range(1, 6), weights=probs, k=1)[0]
+        self.action_cost(action)
+        self.print_action(action)
+        return action
+
+
     def gbc_action(self, action_state_window, current_state, player_number):
         """
         Function for GBC AI model.
@@ -258,144 +296,27 @@ class Computer(Player):
         :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
         :return: The integer corresponding to the action that the AI model plays, from 1 to 5.
         """
-        vec = np.asarray(action_state_window, dtype=float).reshape(-1)
-        df_input = pd.DataFrame([vec], columns=self.feature_cols)
-        probs = self.clf.predict_proba(df_input)[0]
-
-        if current_state[3-player_number] < 1:
-            probs[3] = 0
-            probs[4] = 0
-        if current_state[3-player_number] < 3:
-            probs[4] = 0
-        s = probs.sum()
-        if s > 0:
-            probs /= s
-        else:
-            return self.random_action()
-        pred_action = int(np.argmax(probs)) + 1
-        self.predict = pred_action
-        return self.decision(pred_action, current_state, player_number)
+        probs = self.predictor.predict_proba(action_state_window)[0]
+        return self.predicted_decision(probs, current_state, player_number, action_state_window)
 
 
 
     def decision(self, predicted_action, current_state, player_number):
         """
-        Function to decide on which action the AI model should play. Which will be determined by the best expected value for each possible actions.
+        Function to decide on which action the AI model should play. Which will be determined by the best expected value for each possible actions, read from the expected value table of rules.py.
         :param predicted_action: Predicted action the opponent is to play, determined by the AI model.
         :param current_state: Current state of the player's (i.e., hp and mp).
         :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
         :return: The integer corresponding to the action that the AI model plays, from 1 to 5.
         """
-        expected_value = -100 # Initial expected value
-        best_action = None # Integer value corresponding to the action the AI model should play.
-
-        for i in range(1,6):
-            if i == 4 or i == 5:
-                if current_state[2+player_number] < 1: # Masks impossible actions
-                    continue
-            if i == 5:
-                if current_state[2+player_number] < 3: # Masks impossible actions
-                    continue
-            action_value = self.resolve_turn(current_state, predicted_action, i, player_number)
-            if expected_value < action_value:
-                expected_value = action_value
-                best_action = i
-
-        if best_action is None:
-            return self.random_action()
+        _, best_actions = expected_value_table(self.cfg.max_health_points, self.cfg.max_mana_points, tuple(self.cfg.ev_weights)) # Built once per set of weights
+        best_action = int(best_actions[tuple(current_state) + (player_number, predicted_action - 1)])
 
         self.print_action(best_action)
         self.action_cost(best_action)
         return best_action
 
 
-
-    def resolve_turn(self, current_state, predicted_action, tentative_action, player_number):
-        """
-        Function that computes the statistical outcome of each action, in terms of resulting hp and mp for each player. Mirrors round_development function in game.py
-        :param current_state: Current state of the player's (i.e., hp and mp).
-        :param predicted_action: Predicted action the opponent is to play, determined by the AI model.
-        :param tentative_action: Possible action to be taken by the AI model.
-        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
-        :return: The expected value of the respective possible action to be taken by the AI model.
-        """
-        stats_outcome = [current_state[0], current_state[1], current_state[2], current_state[3], 0] # List corresponding to the hp and mp of each player and an integer representing whether death of either player occurs.
-        action_list = predicted_action, tentative_action # When we target the one commiting the action we use (player_turn + player_number + 1) % 2, if we are targeting the one receiving the outcome then we use (player_turn + player_number) % 2
-        player_turn = 0
-        for i in action_list:
-            match i:
-                case 1:  # Attack
-                    stats_outcome[(player_turn + player_number) % 2] += -1
-                case 2:  # Defend
-                    if action_list[(player_turn + 1) % 2] == 1:
-                        if stats_outcome[(player_turn + player_number) % 2 + 2] > 0:
-                            stats_outcome[(player_turn + player_number) % 2 + 2] -= 1
-                        stats_outcome[(player_turn + player_number + 1) % 2] += 1
-                case 3:  # Rest
-                    stats_outcome[(player_turn + player_number + 1) % 2 + 2] += 2
-                case 4:  # Counter
-                    stats_outcome[(player_turn + player_number + 1) % 2 + 2] -= 1
-                    if action_list[(player_turn + 1) % 2] == 1:
-                        stats_outcome[(player_turn + player_number + 1) % 2] += 1
-                        stats_outcome[(player_turn + player_number) % 2] += -1
-                case 5:  # Steal
-                    stats_outcome[(player_turn + player_number + 1) % 2 + 2] -= 3
-                    match action_list[(player_turn + 1) % 2]:
-                        case 1:  # Attack
-                            stats_outcome[(player_turn + player_number + 1) % 2] += 1
-                            stats_outcome[(player_turn + player_number) % 2] += -1
-                        case 2:  # Defend
-                            stats_outcome[(player_turn + player_number) % 2 + 2] += -1
-                            if stats_outcome[(player_turn + player_number) % 2+2] >= 0:
-                                stats_outcome[(player_turn + player_number+1) % 2 + 2] += 1
-                            else:
-                                stats_outcome[(player_turn + player_number) % 2 + 2] = 0
-                                stats_outcome[(player_turn + player_number) % 2] -= 1
-                        case 3:  # Rest
-                            stats_outcome[(player_turn + player_number + 1) % 2] += 1
-                            stats_outcome[(player_turn + player_number) % 2] += -1
-                            stats_outcome[(player_turn + player_number+1) % 2 + 2] += 1
-                            stats_outcome[(player_turn + player_number) % 2 + 2] += -1
-                        case 4:  # Counter
-                            stats_outcome[(player_turn + player_number + 1) % 2] += 1
-                            stats_outcome[(player_turn + player_number) % 2] += -1
-                            if stats_outcome[(player_turn + player_number) % 2 + 2] >= 0:
-                                stats_outcome[(player_turn + player_number + 1) % 2 + 2] += 1
-                                if stats_outcome[(player_turn + player_number) % 2 + 2] > 0:
-                                    stats_outcome[((player_turn + player_number) % 2) + 2] += -1
-                        case 5:  # Steal
-                            pass  # Nothing occurs
-            player_turn += 1
-
-        if stats_outcome[0] == 0 and stats_outcome[1] == 0:
-            stats_outcome[4] = -1
-        elif stats_outcome[1-player_number] == 0:
-            stats_outcome[4] = 1
-        elif stats_outcome[0+player_number] == 0:
-            stats_outcome[4] = -1
-        else:
-            stats_outcome[4] = 0
-        return self.ev_score(stats_outcome, current_state, player_number)
-
-
-
-    def ev_score(self, stats_outcome, current_state, player_number):
-        """
-        Function to calculate the expected value each action would result in, based on a simplistic formula.
-        :param stats_outcome: The list of changes incurred by the players based on the selected action from the AI model.
-        :param current_state: Current state of the player's (i.e., hp and mp).
-        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
-        :return: A score dictating the expected value of the possible action.
-        """
-        w_hp = 1.0
-        w_mp = 0.25
-        w_term = 5.0
-        delta_health = [current_state[0] - stats_outcome[0], current_state[1] - stats_outcome[1]]
-        delta_mana =  [current_state[2] - stats_outcome[2], current_state[3] - stats_outcome[3]]
-        expected_value = w_hp*(delta_health[1-player_number]-delta_health[0+player_number])+w_mp*(delta_mana[1-player_number]-delta_mana[0+player_number])+w_term*stats_outcome[4]
-        return expected_value
-
-
     def model_update(self, action_state_window, true_action):
         """
         Function to update the online model (Stochastic Gradient Classifier)
@@ -404,10 +325,30 @@ class Computer(Player):
         :return: Nothing.
         """
         if self.name == "ADAPTIVE":
-            self.clf.partial_fit(action_state_window, np.array([true_action]))
+            if self.replay is None:
+                self.fit(action_state_window, np.array([true_action]))
+            else:
+                self.replay.add(action_state_window, true_action)
+                if self.replay.pending >= self.cfg.replay_flush:
+                    self.fit(*self.replay.batch())
+
+
+    def fit(self, X, y):
+        """
+        Function that applies one update to the online model, from a single row or a mini-batch of the replay buffer.
+        :param X: Matrix containing one action_state_window per row.
+        :param y: The actual actions taken by the opposing player.
+        :return: Nothing.
+        """
+        self.clf.partial_fit(X, y)
+        self.predictor.refresh() # Compiled inference follows the updated coefficients
+        if self.search is not None: self.search.clear() # Values cached by the search used the previous coefficients
 
 
     def save(self): # Once the game is over, saves the ML model
-        if self.path is not None and self.clf is not None and self.name != "GBC":
-            joblib.dump(self.clf, self.path)
+        if self.replay is not None and self.replay.pending > 0: # Rounds of the game not yet learned
+            self.fit(*self.replay.batch())
+        if self.path is not None and self.clf is not None and self.name != "GBC" and self.cfg.persist_learning:
+            REGISTRY.put(self.cfg, "ADAPTIVE", self.clf)
+            REGISTRY.checkpoint(self.cfg, "ADAPTIVE")
 
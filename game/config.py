@@ -17,6 +17,52 @@ class Config:
     models_dir: Path = Path("models")
     data_dir: Path = Path("data")
 
+    # Weights (w_hp, w_mp, w_term) of the expected value of an action, used by the decisions of the Adaptive and GBC models
+    ev_weights: tuple = (1.0, 0.25, 5.0)
+
+    # Expectimax search of the Adaptive and GBC models, 0 keeps the one-round decision against the most likely action of the opponent
+    search_depth: int = 0
+    search_nodes: int = 2000 # Budget of nodes expanded per move beyond the first round
+    search_time: float = 0.05 # Budget in seconds per move beyond the first round
+
+    # Training of the Adaptive model, spread across the workers of the multiprocess runner
+    adaptive_training_games: int = 1000
+    sync_games: int = 50 # Games played by each worker on its local copy of the model between two merges of the parameters
+
+    # Replay buffer of the Adaptive model
+    replay_flush: int = 1 # Rounds learned per update, 1 updates the model immediately every round
+    replay_capacity: int = 64 # Rounds held by the buffer
+    replay_sampling: str = "FIFO" # "FIFO" learns the new rounds in order, "UNIFORM" draws them uniformly among the rounds held
+
+    # Number of games played to generate the training data set of the GBC model
+    training_games: int = 2000
+    data_format: str = "BINARY" # "BINARY" stores the data set as a raw uint8 feature matrix and int8 label vector, "CSV" as a csv file
+
+    # Incremental training of the GBC model, which only fits the rows added to the data set since its last training
+    gbc_chunk_size: int = 200000 # Rows of the data set read and fitted at once
+    gbc_chunk_iterations: int = 40 # Boosting iterations added per chunk
+
+    # Sequential early stop of AI vs AI, the assessment and the command line matches
+    early_stop: str = "OFF" # "CI" stops a pairing once the 95% intervals of the win rate and prediction accuracy of player 2 are narrower than stop_ci_width, "SPRT" once a sequential probability ratio test on the decisive games (ties left out) decides which player is stronger, "OFF" plays every game
+    stop_ci_width: float = 0.1
+    stop_sprt_delta: float = 0.05 # The SPRT tests a share of the decisive games won by player 2 of 0.5 - delta against 0.5 + delta
+    stop_alpha: float = 0.05 # Error rates of the SPRT
+    stop_beta: float = 0.05
+    stop_batch: int = 100 # Games played between two checks
+
+    # Checkpoints of the Adaptive model
+    checkpoint_mode: str = "GAMES" # "GAMES" saves every checkpoint_interval games, "SECONDS" every checkpoint_interval seconds, "END" only at the end of the run, "OFF" never
+    checkpoint_interval: float = 1
+
+    # Number of games advanced together by the GamePool scheduler, 1 plays the games one after another
+    pool_size: int = 1
+
+    # Multiprocess runner, used when workers is above 1 or a base seed is given
+    workers: int = 1
+    chunk_size: int = 100
+    base_seed: int | None = None
+    persist_learning: bool = True # False keeps the Adaptive model of every game at the model saved on disk when the run started
+
 
     def model_sig(self):
         """
@@ -49,10 +95,11 @@ class Config:
 
     def data_set_existence(self):
         """
-        Function that checks if the data set exists.
+        Function that checks if the data set exists, in either format.
         :return: Boolean indicating whether the data set for GBC training exists or not.
         """
-        return self.data_query().exists()
+        features_path, labels_path = self.binary_data_query()
+        return self.data_query().exists() or (features_path.exists() and labels_path.exists())
 
 
     def data_query(self):
@@ -63,6 +110,33 @@ class Config:
         return self.data_dir / f"GBC_Training_{self.model_sig()}.csv"
 
 
+    def shard_query(self, shard):
+        """
+        Function that makes the path of one shard of the data set, written by a single worker before being merged into the data set.
+        :param shard: Index of the shard.
+        :return: The path of the shard file.
+        """
+        return self.data_dir / f"GBC_Training_{self.model_sig()}_shard{shard}.csv"
+
+
+    def binary_data_query(self, shard = None):
+        """
+        Function that makes the paths of the binary data set, made of a feature matrix file and a label vector file.
+        :param shard: Index of a shard of the data set, or None for the data set itself.
+        :return: Tuple of the paths of the feature matrix and of the label vector.
+        """
+        name = f"GBC_Training_{self.model_sig()}" if shard is None else f"GBC_Training_{self.model_sig()}_shard{shard}"
+        return self.data_dir / f"{name}_features.u8", self.data_dir / f"{name}_labels.i8"
+
+
+    def tournament_query(self):
+        """
+        Function that makes the path of the cached results of the tournament, which depend on the model signature and the number of turns.
+        :return: The path of the tournament file.
+        """
+        return self.data_dir / f"Tournament_{self.model_sig()}_T{self.max_num_turns}.json"
+
+
     def print_config(self):
         """
         Print the current parameters of the game.
@@ -0,0 +1,172 @@
+from functools import lru_cache
+import numpy as np
+import os
+import shutil
+
+
+def feature_count(cfg):
+    """
+    Function that computes the number of features of an action_state_window for the current configuration.
+    :param cfg: Object of the class Config.
+    :return: Number of features, i.e., the k previous rounds of actions, the hp of both players, and the one-hot mp of both players.
+    """
+    return 10 * cfg.k + 2 + (cfg.max_mana_points + 1) * 2
+
+
+@lru_cache(maxsize=None)
+def reversal_index(k, max_mana_points):
+    """
+    Function that precomputes the permutation turning an encoded action_state_window into the perspective of the opposing player: the two halves of every round of actions, the two hp and the two one-hot mp are swapped.
+    :param k: History window k.
+    :param max_mana_points: Maximum mana points of a player.
+    :return: Read-only array of indices to apply to the columns of an encoded row.
+    """
+    mana_length = max_mana_points + 1
+    index = []
+    for i in range(k):
+        index.extend(range(i * 10 + 5, i * 10 + 10))
+        index.extend(range(i * 10, i * 10 + 5))
+    index.extend([10 * k + 1, 10 * k])
+    mp_start = 10 * k + 2
+    index.extend(range(mp_start + mana_length, mp_start + 2 * mana_length))
+    index.extend(range(mp_start, mp_start + mana_length))
+    index = np.array(index, dtype=np.intp)
+    index.flags.writeable = False
+    return index
+
+
+def binary_existence(cfg, shard = None):
+    """
+    Function that checks if the binary data set exists.
+    :param cfg: Object of the class Config.
+    :param shard: Index of a shard of the data set, or None for the data set itself.
+    :return: Boolean indicating whether the binary data set exists or not.
+    """
+    features_path, labels_path = cfg.binary_data_query(shard)
+    return features_path.exists() and labels_path.exists()
+
+
+def append_binary(features_path, labels_path, features, labels):
+    """
+    Function that appends rows to a binary data set: a raw uint8 feature matrix, stored row after row, and a raw int8 label vector.
+    Every feature is a 0/1 flag or a small integer (hp), so no information is lost.
+    :param features_path: Path of the feature matrix file.
+    :param labels_path: Path of the label vector file.
+    :param features: Matrix containing one action_state_window per row.
+    :param labels: True action taken by the player for each row.
+    :return: Nothing.
+    """
+    with open(features_path, "ab") as file:
+        file.write(np.ascontiguousarray(features, dtype=np.uint8).tobytes())
+    with open(labels_path, "ab") as file:
+        file.write(np.ascontiguousarray(labels, dtype=np.int8).tobytes())
+
+
+def load_binary(cfg, shard = None):
+    """
+    Function that memory-maps the binary data set, so that it is read from disk only as it is used.
+    :param cfg: Object of the class Config.
+    :param shard: Index of a shard of the data set, or None for the data set itself.
+    :return: Tuple of the feature matrix (rows, features) and the label vector.
+    """
+    features_path, labels_path = cfg.binary_data_query(shard)
+    n_features = feature_count(cfg)
+    n_rows = os.path.getsize(labels_path)
+    if os.path.getsize(features_path) != n_rows * n_features:
+        raise ValueError(f"{features_path} does not hold {n_rows} rows of {n_features} features.")
+    if n_rows == 0: # An empty file cannot be memory-mapped
+        return np.zeros((0, n_features), dtype=np.uint8), np.zeros(0, dtype=np.int8)
+    features = np.memmap(features_path, dtype=np.uint8, mode="r", shape=(n_rows, n_features))
+    labels = np.memmap(labels_path, dtype=np.int8, mode="r", shape=(n_rows,))
+    return features, labels
+
+
+def csv_to_binary(cfg, chunk_size = 100000):
+    """
+    Function that converts the existing CSV data set into the binary data set, replacing any previous binary data set. The CSV is read in chunks to bound memory.
+    :param cfg: Object of the class Config.
+    :param chunk_size: Number of rows converted at once.
+    :return: Number of rows converted.
+    """
+    import pandas as pd
+
+    features_path, labels_path = cfg.binary_data_query()
+    tmp_features, tmp_labels = f"{features_path}.tmp", f"{labels_path}.tmp"
+    for path in (tmp_features, tmp_labels):
+        if os.path.exists(path):
+            os.remove(path)
+    open(tmp_features, "wb").close()
+    open(tmp_labels, "wb").close()
+    n_rows = 0
+    for chunk in pd.read_csv(cfg.data_query(), chunksize=chunk_size):
+        append_binary(tmp_features, tmp_labels, chunk.drop(columns="label").to_numpy(), chunk["label"].to_numpy())
+        n_rows += len(chunk)
+    os.replace(tmp_features, features_path)
+    os.replace(tmp_labels, labels_path)
+    return n_rows
+
+
+def convert_csv(cfg):
+    """
+    Function that converts the CSV data set into the binary data set if only the former exists. Must be called before appending to the binary data set, whose existence would otherwise hide the rows of the CSV.
+    :param cfg: Object of the class Config.
+    :return: Boolean indicating whether the CSV data set was converted.
+    """
+    if not cfg.data_query().exists() or binary_existence(cfg):
+        return False
+    print("Converting the CSV data set to the binary format. Please wait...")
+    csv_to_binary(cfg)
+    return True
+
+
+def merge_binary(cfg, shards):
+    """
+    Function that appends the binary shards, in order, to the binary data set, and removes them.
+    :param cfg: Object of the class Config.
+    :param shards: Indices of the shards.
+    :return: Nothing.
+    """
+    convert_csv(cfg) # Rows of a previous CSV data set come first
+    data_paths = cfg.binary_data_query()
+    for shard in shards:
+        for data_path, shard_path in zip(data_paths, cfg.binary_data_query(shard)):
+            with open(data_path, "ab") as data_file, open(shard_path, "rb") as shard_file:
+                shutil.copyfileobj(shard_file, data_file)
+            os.remove(shard_path)
+
+
+def compact(features, labels):
+    """
+    Function that collapses the rows of a data set into its unique (action_state_window, label) pairs, with the number of times each pair occurs.
+    Self-play repeats the same situations many times, so fitting the unique rows weighted by their counts gives the same model for a fraction of the rows.
+    :param features: Matrix containing one action_state_window per row.
+    :param labels: True action taken by the player for each row.
+    :return: Tuple of the unique feature rows, their labels, and their counts.
+    """
+    rows = np.empty((features.shape[0], features.shape[1] + 1), dtype=np.uint8)
+    rows[:, :-1] = features
+    rows[:, -1] = labels
+    unique_rows, counts = np.unique(rows.view(np.dtype((np.void, rows.shape[1]))).ravel(), return_counts=True) # Each row compared as one block of bytes, much faster than np.unique(axis=0)
+    unique_rows = unique_rows.view(np.uint8).reshape(-1, rows.shape[1])
+    return unique_rows[:, :-1], unique_rows[:, -1].astype(np.int64), counts
+
+
+def load_training_data(cfg):
+    """
+    Function that loads the training data set of the GBC model in the format selected by the configuration.
+    The binary data set is memory-mapped, and is first converted from the CSV data set if only the latter exists.
+    :param cfg: Object of the class Config.
+    :return: Tuple of the feature matrix, the label vector, and the names of the features.
+    """
+    from game import DataLogger
+
+    feature_cols = DataLogger(cfg).header[:-1]
+    if cfg.data_format == "BINARY":
+        convert_csv(cfg)
+        features, labels = load_binary(cfg)
+        return features, labels, feature_cols
+
+    import pandas as pd
+
+    df = pd.read_csv(cfg.data_query())
+    return df[feature_cols].to_numpy(), df["label"].to_numpy(), feature_cols
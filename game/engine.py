@@ -0,0 +1,234 @@
+import numpy as np
+
+from dataset import reversal_index
+from rules import transition_table
+
+POLICIES = ("RANDOM", "SIMPLE") # AI models that the engine plays natively
+
+
+class BatchGame:
+    """
+    Class BatchGame, which plays many games of DRACS in lockstep. The state of every game (hp, mp, turn and one-hot action history) is held in NumPy arrays,
+    and each round of all the games is resolved at once with the same transition table as Game.round_development.
+    """
+    def __init__(self, cfg, names_1, names_2, game_number, training_game = False, seed = None):
+        self.cfg = cfg
+        self.k = cfg.k
+        self.turn_max = cfg.max_num_turns
+        self.game_number = game_number
+        self.policies = (self.policy_codes(names_1), self.policy_codes(names_2))
+        self.rng = np.random.default_rng(seed)
+        self.turn_number = 1
+        self.health_points = np.full((game_number, 2), cfg.max_health_points, dtype=np.int64) # (hp1, hp2) of every game
+        self.mana_points = np.full((game_number, 2), cfg.starting_mana_points, dtype=np.int64) # (mp1, mp2) of every game
+        self.history = np.zeros((game_number, self.turn_max, 10), dtype=np.uint8) # One-hot actions of both players for every round
+        self.turns = np.zeros(game_number, dtype=np.int64) # Number of rounds played in every game
+        self.active = np.ones(game_number, dtype=bool)
+        self.winner = np.full(game_number, -1, dtype=np.int64) # Same convention as Game.winner: 1, 2, or 0 for a tie
+        self.acc_prediction = 0
+        self.innac_prediction = 0
+        self.training_game = training_game
+        self.recorded = [] # (game index, turn, features, labels) recorded every round when training
+        self.reversal = self.reversal_index()
+        self.transitions = transition_table(cfg.max_health_points, cfg.max_mana_points)
+
+
+    def policy_codes(self, names):
+        """
+        Function that converts the name, or the per-game names, of the AI model playing one side into policy codes.
+        :param names: Core name of the AI model for every game, or list with one name per game.
+        :return: Array of policy codes (index in POLICIES) with one entry per game.
+        """
+        if isinstance(names, str):
+            names = [names] * self.game_number
+        codes = np.empty(self.game_number, dtype=np.int64)
+        for i, name in enumerate(names):
+            name = name.removesuffix("_2") # Training names only change the perspective of the saved model
+            if name not in POLICIES:
+                raise ValueError(f"{name} cannot be played by the batch engine.")
+            codes[i] = POLICIES.index(name)
+        return codes
+
+
+    def reversal_index(self):
+        """
+        Function that gives the permutation turning an encoded action_state_window into the perspective of the opposing player, shared with Game and DataLogger.
+        :return: Array of indices to apply to the columns of the encoded rows.
+        """
+        return reversal_index(self.k, self.cfg.max_mana_points)
+
+
+    def run(self):
+        """
+        Function that plays every game until they are all over, mirroring Game.start_game.
+        :return: Array containing the winner of every game.
+        """
+        while self.active.any():
+            games = np.flatnonzero(self.active)
+            if self.turn_number > self.turn_max:
+                self.turned_out(games)
+                break
+            self.round_development(games)
+            self.check_win(games)
+            self.turn_number += 1
+        return self.winner
+
+
+    def take_action(self, games):
+        """
+        Function that asks the policy of each player for their action in every active game, and records the round when training.
+        :param games: Indices of the active games.
+        :return: Array of shape (games, 2) with the action of both players, from 1 to 5.
+        """
+        health_points = self.health_points[games]
+        mana_points = self.mana_points[games]
+        actions = np.empty((games.shape[0], 2), dtype=np.int64)
+        for player_number in range(2):
+            policy = self.policies[player_number][games]
+            random_actions = self.random_action(mana_points[:, player_number])
+            simple_actions = self.simple_action(health_points, mana_points, player_number)
+            actions[:, player_number] = np.where(policy == POLICIES.index("SIMPLE"), simple_actions, random_actions)
+
+        self.innac_prediction += games.shape[0] # RANDOM and SIMPLE never predict an action
+        if self.training_game:
+            self.record(games, health_points, mana_points, actions)
+        return actions
+
+
+    def random_action(self, mana_points):
+        """
+        Function for the Random AI model, drawing uniformly among the actions each player can afford.
+        :param mana_points: Mana points of the player in every game.
+        :return: Array of actions, from 1 to 5.
+        """
+        allowed = np.where(mana_points < 1, 3, np.where(mana_points < 3, 4, 5)) # Counter needs 1 mp and Steal needs 3 mp
+        return self.rng.integers(1, allowed + 1)
+
+
+    def simple_action(self, health_points, mana_points, player_number):
+        """
+        Function for the Simple AI model, applying the rules of Computer.simple_action to every game at once.
+        :param health_points: Array of shape (games, 2) with the hp of both players.
+        :param mana_points: Array of shape (games, 2) with the mp of both players.
+        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
+        :return: Array of actions, from 1 to 5.
+        """
+        my_hp, opp_hp = health_points[:, player_number], health_points[:, 1 - player_number]
+        my_mp, opp_mp = mana_points[:, player_number], mana_points[:, 1 - player_number]
+        draw = self.rng.random(my_hp.shape[0]) * 100
+        low_mana = (my_mp == 1) | (my_mp == 2)
+        conditions = [
+            (my_hp >= 3) & (my_mp == 0),
+            low_mana & (my_hp == 1) & (opp_mp >= 3),
+            low_mana & (my_hp == 1) & (opp_mp == 2),
+            (my_mp == 0) & (opp_hp == 1),
+            my_mp == 2,
+            my_mp == 1,
+            my_mp >= 3,
+        ]
+        choices = [
+            np.where(draw < 45, 1, 3), # 45% Attack, 55% Rest
+            2,
+            4,
+            1,
+            1,
+            3,
+            5,
+        ]
+        return np.select(conditions, choices, default=np.where(draw < 40, 1, 3)) # 40% Attack, 60% Rest
+
+
+    def round_development(self, games):
+        """
+        Function that resolves one round of every active game with a single lookup in the transition table of rules.py, which also resolves the rounds of Game.round_development.
+        :param games: Indices of the active games.
+        :return: Nothing.
+        """
+        actions = self.take_action(games)
+        health_points = self.health_points[games]
+        mana_points = self.mana_points[games]
+        next_state = self.transitions[health_points[:, 0], health_points[:, 1], mana_points[:, 0], mana_points[:, 1], actions[:, 0] - 1, actions[:, 1] - 1]
+
+        self.health_points[games] = next_state[:, :2]
+        self.mana_points[games] = next_state[:, 2:]
+        self.history[games, self.turn_number - 1, actions[:, 0] - 1] = 1
+        self.history[games, self.turn_number - 1, actions[:, 1] + 4] = 1
+        self.turns[games] = self.turn_number
+
+
+
+    def check_win(self, games):
+        """
+        Function that ends the games in which a player reached zero hp, mirroring Game.check_win and Game.call_win.
+        :param games: Indices of the active games.
+        :return: Nothing.
+        """
+        dead = self.health_points[games] == 0
+        over = dead.any(axis=1)
+        winner = np.where(dead[:, 0] & dead[:, 1], 0, np.where(dead[:, 0], 2, 1))
+        self.winner[games[over]] = winner[over]
+        self.active[games[over]] = False
+
+
+    def turned_out(self, games):
+        """
+        Function called when the maximum number of turns is reached, mirroring Game.turned_out.
+        :param games: Indices of the games still running.
+        :return: Nothing.
+        """
+        scores = self.health_points[games] + self.mana_points[games] * 0.75
+        self.winner[games] = np.where(scores[:, 0] < scores[:, 1], 2, np.where(scores[:, 0] > scores[:, 1], 1, 0))
+        self.active[games] = False
+
+
+    def encode_sequence(self, games, health_points, mana_points):
+        """
+        Function that encodes the action_state_window of every active game, as Game.encode_sequence does for a single game.
+        :param games: Indices of the active games.
+        :param health_points: Array of shape (games, 2) with the hp of both players.
+        :param mana_points: Array of shape (games, 2) with the mp of both players.
+        :return: Array of shape (games, features) with the encoded windows.
+        """
+        mana_length = self.cfg.max_mana_points + 1
+        x = np.zeros((games.shape[0], 10 * self.k + 2 + mana_length * 2), dtype=np.float32)
+        played = self.turn_number - 1
+        window = self.history[games, max(0, played - self.k):played]
+        x[:, :window.shape[1] * 10] = window.reshape(games.shape[0], -1)
+        x[:, 10 * self.k:10 * self.k + 2] = health_points
+        rows = np.arange(games.shape[0])
+        x[rows, 10 * self.k + 2 + mana_points[:, 0]] = 1
+        x[rows, 10 * self.k + 2 + mana_length + mana_points[:, 1]] = 1
+        return x
+
+
+    def record(self, games, health_points, mana_points, actions):
+        """
+        Function that records the rows DataLogger.record would write for this round of every active game.
+        :param games: Indices of the active games.
+        :param health_points: Array of shape (games, 2) with the hp of both players.
+        :param mana_points: Array of shape (games, 2) with the mp of both players.
+        :param actions: Array of shape (games, 2) with the action of both players.
+        :return: Nothing.
+        """
+        features = self.encode_sequence(games, health_points, mana_points)
+        self.recorded.append((games, self.turn_number, features, actions))
+
+
+    def training_rows(self):
+        """
+        Function that gathers the recorded rows in the order in which Game would have logged them, game by game and round by round, each round giving the row of player 1 then the reversed row of player 2.
+        :return: Tuple of the feature matrix and the label vector.
+        """
+        if not self.recorded:
+            return np.zeros((0, self.reversal.shape[0]), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        games = np.concatenate([r[0] for r in self.recorded])
+        turns = np.concatenate([np.full(r[0].shape[0], r[1]) for r in self.recorded])
+        features = np.concatenate([r[2] for r in self.recorded])
+        actions = np.concatenate([r[3] for r in self.recorded])
+        order = np.lexsort((turns, games))
+        features, actions = features[order], actions[order]
+        rows = np.empty((features.shape[0] * 2, features.shape[1]), dtype=np.float32)
+        rows[0::2] = features
+        rows[1::2] = features[:, self.reversal]
+        labels = actions.reshape(-1)
+        return rows, labels
@@ -1,42 +1,82 @@
 import csv
 import os
+from functools import lru_cache
 from operator import indexOf
 import numpy as np
 
 from computer import ACTIONS
+from dataset import append_binary, convert_csv, feature_count, reversal_index
+from rules import transition_table
 import computer
 
 
+@lru_cache(maxsize=None)
+def ring_order(k):
+    """
+    Function that precomputes, for every position of the oldest round in the ring of the last k rounds, the indices reading the ring from the oldest round to the newest.
+    :param k: History window k.
+    :return: Read-only matrix of k rows of 10*k indices into the flattened ring.
+    """
+    order = (np.arange(k)[:, None] + np.arange(k)[None, :]) % k # Slot of the i-th oldest round when the oldest is in slot h
+    order = (order[:, :, None] * 10 + np.arange(10)).reshape(k, 10 * k)
+    order.flags.writeable = False
+    return order
+
+
+
 class Game:
-    def __init__(self, cfg, player_1, player_2, training_game = False):
+    __slots__ = ("cfg", "turn_max", "player_1", "player_2", "turn_number", "k", "ring", "ring_flat", "ring_order", "rounds", "window", "reversed_window", "reversal",
+                 "winner", "acc_prediction", "innac_prediction", "training_game", "loggers", "transitions", "action_viewer")
+
+    def __init__(self, cfg, player_1, player_2, training_game = False, autoplay = True):
         self.cfg = cfg
         self.turn_max = cfg.max_num_turns
         self.player_1 = player_1
         self.player_2 = player_2
         self.turn_number = 1
-        self.history = []
         self.k = cfg.k
+        # Buffers of the action_state_window, filled in place every round. The actions of the last k rounds are kept in a ring, the oldest being overwritten.
+        self.ring = np.zeros((self.k, 10), dtype=np.float32)
+        self.ring_flat = self.ring.reshape(-1)
+        self.ring_order = ring_order(self.k)
+        self.rounds = 0 # Number of rounds played, whose actions went through the ring
+        self.window = np.zeros(feature_count(cfg), dtype=np.float32)
+        self.reversed_window = np.empty_like(self.window)
+        self.reversal = reversal_index(self.k, cfg.max_mana_points)
         self.winner = None
         self.acc_prediction = 0
         self.innac_prediction = 0
         self.training_game = training_game
-        self.loggers = DataLogger(self.cfg)
+        self.loggers = DataLogger(self.cfg) if training_game else None # Only training games record their rows
+        self.transitions = transition_table(cfg.max_health_points, cfg.max_mana_points)
         self.action_viewer = cfg.action_viewer
-        self.start_game()
+        if autoplay: self.start_game() # Otherwise the game is advanced round by round through step(), e.g., by the GamePool scheduler.
 
 
     # Main game loop
     def start_game(self):
-        while True:
-            if self.turn_number > self.turn_max:
-                if self.action_viewer: print("Out of Time!")
-                self.turned_out()
-                break
-            self.print_round()
-            self.round_development()
-            if self.call_win(self.check_win()):
-                break
-            self.turn_number += 1
+        while not self.step():
+            pass
+
+
+
+    def step(self, observation = None, player_actions = None):
+        """
+        Function that plays one round of the game, or ends the game when the maximum number of turns is reached.
+        :param observation: Tuple returned by observe() for this round, or None to compute it.
+        :param player_actions: Actions already chosen by the players for this round, or None to ask the players.
+        :return: Boolean value indicating if the game is over.
+        """
+        if self.turn_number > self.turn_max:
+            if self.action_viewer: print("Out of Time!")
+            self.turned_out()
+            return True
+        self.print_round()
+        self.round_development(observation, player_actions)
+        if self.call_win(self.check_win()):
+            return True
+        self.turn_number += 1
+        return False
 
 
 
@@ -52,22 +92,39 @@ class Game:
 
 
 
-    def take_action(self):
+    def observe(self):
         """
-        Function that calls for each player to make their action, updates the predictive score, updates the models, and calls for recording of the actions if enabled
-        :return: The player's action
+        Function that constructs the input for the AI models at the start of a round.
+        The windows are views of the buffers of the game, overwritten at the next observation, so a window kept beyond the round must be copied.
+        :return: Tuple of the current state of the players, the action_state_window seen by player 2, and the reversed action_state_window seen by player 1.
         """
-        # Calls the required functions to construct the input for the AI model
         p1_state = self.player_1.get_state()
         p2_state = self.player_2.get_state()
         current_state = (p1_state[0], p2_state[0], p1_state[1], p2_state[1])
-        action_state_window = self.encode_sequence(self.history, current_state).reshape(1, -1)
-        reversed_action_state_window = self.loggers.action_state_reversal(action_state_window.copy().flatten().tolist())
-        reversed_action_state_window = np.array(reversed_action_state_window, dtype=np.float32).reshape(1, -1)
+        action_state_window = self.encode_sequence(current_state)
+        np.take(action_state_window, self.reversal, out=self.reversed_window) # The perspective of player 1, by the precomputed permutation
+        return current_state, action_state_window.reshape(1, -1), self.reversed_window.reshape(1, -1)
+
+
+
+    def take_action(self, observation = None, player_actions = None):
+        """
+        Function that calls for each player to make their action, updates the predictive score, updates the models, and calls for recording of the actions if enabled
+        :param observation: Tuple returned by observe() for this round, or None to compute it.
+        :param player_actions: Actions already chosen by the players for this round, or None to ask the players.
+        :return: The player's action
+        """
+        # Calls the required functions to construct the input for the AI model
+        if observation is None:
+            observation = self.observe()
+        current_state, action_state_window, reversed_action_state_window = observation
 
         # Asks for the player's action
-        p1_action = self.player_1.play(reversed_action_state_window, current_state, 0)
-        p2_action = self.player_2.play(action_state_window, current_state, 1)
+        if player_actions is None:
+            p1_action = self.player_1.play(reversed_action_state_window, current_state, 0)
+            p2_action = self.player_2.play(action_state_window, current_state, 1)
+        else:
+            p1_action, p2_action = player_actions
 
         # If player_2 is an AI model (True unless Players are both human), and if the prediction of the AI model matches or not the action of the player, increase respective count.
         if isinstance(self.player_2, computer.Computer) and self.player_2.predict == p1_action:
@@ -87,60 +144,21 @@ class Game:
         return p1_action, p2_action
 
 
-    def round_development(self):
+    def round_development(self, observation = None, player_actions = None):
         """
         Function that will finalize the outcome of each player's action. Distribute the lost hp and mp for each, such that the actions both occur at the same time, and are independent of one another.
-        The function is divided into two types of actions and outcomes. Instant, such as mana, which is subtracted either at call in the player class, or in the match block to subtract from the other player's mana.
-        Timed-actions are those whose outcomes are stored in the stats_box. These will all be distributed at the end, and can either store positive (gain) or negative (loss) values.
+        The outcome is read from the transition table of rules.py, indexed by the state of the players before their actions and by their actions. The mana costs paid by the players when playing are included in the table.
+        :param observation: Tuple returned by observe() for this round, or None to compute it.
+        :param player_actions: Actions already chosen by the players for this round, or None to ask the players.
         :return: Nothing.
         """
-        stats_box = [0, 0, 0, 0] # (hp1, hp2, mp1, mp2)
-        player_list = (self.player_1, self.player_2)
-        action_list = self.take_action()
-        player_turn = 0
-        for i in action_list:
-            match i:
-                case 1: # Attack
-                    stats_box[(player_turn+1)%2] += -1
-                case 2: # Defend
-                    if action_list[(player_turn+1)%2] == 1:
-                        player_list[(player_turn+1)%2].set_mana_points(-1,2) # Subtracts the opposing player's mana by 1.
-                        stats_box[player_turn] += 1 # Adds one hp to current player to negate attack from other player
-                case 3: # Rest
-                    stats_box[player_turn+2] += 2
-                case 4: # Counter
-                    if action_list[(player_turn+1)%2] == 1:
-                        stats_box[player_turn] += 1
-                        stats_box[(player_turn+1)%2] += -1
-                case 5: # Steal
-                    match action_list[(player_turn+1)%2]:
-                        case 1: # Attack
-                            stats_box[player_turn] += 1
-                            stats_box[(player_turn+1)%2] += -1
-                        case 2: # Defend
-                            stats_box[((player_turn + 1) % 2) + 2] += -1 # Subtracts one mana point from opponent, in stats_box.
-                            if player_list[(player_turn + 1) % 2].get_mana_points() > 0: # If opponent has at least 1 mana point when defending, increase current player's mana by 1.
-                                stats_box[player_turn+ 2] += 1
-                        case 3: # Rest
-                            stats_box[player_turn] += 1
-                            stats_box[(player_turn + 1) % 2] += -1
-                            stats_box[player_turn + 2] += 1
-                            stats_box[((player_turn + 1) % 2) + 2] += -1
-                        case 4: # Counter
-                            stats_box[player_turn] += 1
-                            stats_box[(player_turn + 1) % 2] += -1
-                            if player_list[(player_turn + 1) % 2].get_mana_points() > 0: # Since Counter's mana cost is an instant cost, it is subtracted during call in the player class. Thus, the current player cannot steal non-existent mana.
-                                stats_box[player_turn + 2] += 1
-                                stats_box[((player_turn + 1) % 2) + 2] += -1
-                        case 5: # Steal
-                            pass # Nothing occurs
-            player_turn +=1
-
-        # Distributes the outcome to the players. If the mana value in the stats_box at this moment is in the negative, the player will instead be subtracted a health point.
-        self.player_1.set_health_points(stats_box[0])
-        self.player_2.set_health_points(stats_box[1])
-        self.player_1.set_mana_points(stats_box[2],5)
-        self.player_2.set_mana_points(stats_box[3],5)
+        if observation is None:
+            observation = self.observe() # The state is observed before the players pay their actions
+        current_state = observation[0]
+        p1_action, p2_action = self.take_action(observation, player_actions)
+        hp1, hp2, mp1, mp2 = self.transitions[current_state][p1_action - 1, p2_action - 1].tolist()
+        self.player_1.health_points, self.player_2.health_points = hp1, hp2
+        self.player_1.mana_points, self.player_2.mana_points = mp1, mp2
 
 
 
@@ -204,52 +222,55 @@ class Game:
 
 
     
-    def encode_sequence(self, history, current_state):
+    def encode_sequence(self, current_state):
         """
-        Function used to encode the current state of the game, and the history window that will be considered for the AI model's prediction.
-        :param history: Total action history of the present game, as a list.
+        Function used to encode the current state of the game, and the history window that will be considered for the AI model's prediction, into the window buffer of the game.
         :param current_state: Current state of the player's (i.e., hp and mp).
-        :return: New list merging the previous k round's actions, from history, and the current state of the players.
+        :return: The window buffer, merging the previous k round's actions, oldest first, and the current state of the players.
         """
-        sequence = history[-self.k:]
-        mana_length = self.cfg.max_mana_points+1
-        x = np.zeros(10*self.k+2+mana_length*2, dtype=np.float32)
-        for i in range(len(sequence)):
-            for j in range(len(sequence[i])):
-                x[i * 10 + j] = sequence[i][j]
-        for z in range(0,2):
-            x[10 * self.k + z] = current_state[z]
-        for z in range(0,2):
-            x[10 * self.k + 2 + z*mana_length + current_state[z+2]] = 1
-        return x
+        window = self.window
+        head = self.rounds % self.k if self.rounds >= self.k else 0 # Slot of the oldest round, the ring fills from slot 0 until k rounds are played
+        np.take(self.ring_flat, self.ring_order[head], out=window[:10 * self.k])
+        window[10 * self.k] = current_state[0]
+        window[10 * self.k + 1] = current_state[1]
+        window[10 * self.k + 2:] = 0
+        window[10 * self.k + 2 + current_state[2]] = 1
+        window[10 * self.k + 2 + self.cfg.max_mana_points + 1 + current_state[3]] = 1
+        return window
 
 
     def history_update(self, player_actions): # History is solely for actions
         """
-        Function that updates the total history by adding the new actions taken by the player's to the list.
-        :param player_actions: The player's actions, denoted as 1 to 5 (Corrected in loop to correspond to cell 0 to 4).
+        Function that writes the actions taken by the player's in the ring of the last k rounds, over the oldest round once k rounds are held.
+        :param player_actions: The player's actions, denoted as 1 to 5 (Corrected to correspond to cell 0 to 4).
         :return: Nothing.
         """
-        data_list = []
-        for i in range (0,2): # Actions
-            for j in range (0,5):
-                data_list.append(1) if player_actions[i]-1 == j else data_list.append(0)
-        self.history.append(data_list)
+        row = self.ring[self.rounds % self.k]
+        row[:] = 0
+        row[player_actions[0] - 1] = 1
+        row[5 + player_actions[1] - 1] = 1
+        self.rounds += 1
 
 
 class DataLogger:
     """
-    Class DataLogger, which contains the main functions and definitions to generate the csv file used by the GBC model for training.
+    Class DataLogger, which contains the main functions and definitions to generate the data set used by the GBC model for training, either as a csv file or as a binary feature matrix and label vector.
     """
-    def __init__(self, cfg):
+    def __init__(self, cfg, shard = None):
+        self.cfg = cfg
+        self.shard = shard
         self.k = cfg.k
-        self.filename = cfg.data_query()
+        self.data_format = cfg.data_format
+        self.filename = cfg.data_query() if shard is None else cfg.shard_query(shard)
+        self.binary_paths = cfg.binary_data_query(shard)
         self.max_mana_points = cfg.max_mana_points
+        self.reversal = reversal_index(self.k, self.max_mana_points)
         ACTIONS
         Actor_Viewer = ["my","opp"]
         self.header = [f"h{i}_{z}_{j}" for i in range(1,self.k+1) for z in Actor_Viewer for j in ACTIONS] + ["my_hp"]+ ["opp_hp"] + [f"{z}_mp{u}" for z in Actor_Viewer for u in range(0,self.max_mana_points+1)] + ["label"]
         self.file_exists = os.path.exists(self.filename)
         self.rows = []
+        self.batches = [] # (features, labels) arrays recorded by record_batch
 
 
     def record(self, action_state_window, player_moves):
@@ -259,46 +280,41 @@ class DataLogger:
         :param player_moves: True action taken by the player.
         :return: Nothing.
         """
-        list_action_state_window = action_state_window.copy().flatten().tolist()
-        action_state_actor_1 = list_action_state_window.copy()
-        action_state_actor_2 = self.action_state_reversal(list_action_state_window.copy())
-        self.rows.append(action_state_actor_1 + [player_moves[0]])
-        self.rows.append(action_state_actor_2 + [player_moves[1]])
+        action_state_window = np.asarray(action_state_window).reshape(-1)
+        self.rows.append(action_state_window.tolist() + [player_moves[0]])
+        self.rows.append(action_state_window[self.reversal].tolist() + [player_moves[1]])
 
 
-    def action_state_reversal(self, action_state_window):
+    def record_batch(self, features, labels):
         """
-        Function used to reverse the action history and player states to acquire the perspective of the opposing model/player.
-        :param action_state_window: List containing the action history of the previous k rounds and the state of the players.
-        :return: The reversed action_state_window seen from the opposing perspective.
+        Function that records many rows at once, such as the ones played by the batch engine.
+        :param features: Matrix containing one action_state_window per row.
+        :param labels: True action taken by the player for each row.
+        :return: Nothing.
         """
-        rev_action_state_window = []
-        move_history = action_state_window[:self.k*10]
-        hp_history = action_state_window[self.k*10:self.k*10+2]
-        mp_history = action_state_window[self.k*10+2:]
-
-        for i in range(0,len(move_history),10):
-            first_half = move_history[i:i+5]
-            second_half = move_history[i+5:i+10]
-            rev_action_state_window.extend(second_half)
-            rev_action_state_window.extend(first_half)
-        rev_action_state_window.extend(hp_history[1:])
-        rev_action_state_window.extend(hp_history[:1])
-        first_mp_half = mp_history[:len(mp_history)//2]
-        second_mp_half = mp_history[len(mp_history)//2:]
-        rev_action_state_window.extend(second_mp_half)
-        rev_action_state_window.extend(first_mp_half)
-        return rev_action_state_window
+        self.batches.append((features, labels))
 
 
     def data_GBC_save(self):
         """
-        Function used to save the data in the csv file.
+        Function used to append the recorded rows to the data set, in the format selected by the configuration, and to empty the logger.
         :return: Nothing.
         """
-        with open(self.filename, "a", newline="") as file:
-            writer = csv.writer(file)
-            if not self.file_exists:
-                writer.writerow(self.header)
-            writer.writerows(self.rows)
-
+        if self.data_format == "BINARY":
+            if self.shard is None: convert_csv(self.cfg) # Shards are merged by merge_binary, which converts the CSV itself
+            if self.rows:
+                rows = np.array(self.rows)
+                append_binary(*self.binary_paths, rows[:, :-1], rows[:, -1])
+            for features, labels in self.batches:
+                append_binary(*self.binary_paths, features, labels)
+        else:
+            with open(self.filename, "a", newline="") as file:
+                writer = csv.writer(file)
+                if not self.file_exists:
+                    writer.writerow(self.header)
+                    self.file_exists = True
+                writer.writerows(self.rows)
+                for features, labels in self.batches:
+                    writer.writerows(row + [label] for row, label in zip(features.tolist(), labels.tolist()))
+        self.rows = []
+        self.batches = []
@@ -0,0 +1,148 @@
+import numpy as np
+import warnings
+
+
+class LinearPredictor:
+    """
+    Class LinearPredictor, which compiles the Adaptive model (SGDClassifier with log loss) into plain NumPy arrays.
+    Computes the same probabilities as predict_proba, without the input validation and dispatch overhead of sklearn on a single row.
+    """
+    def __init__(self, clf):
+        self.clf = clf
+        self.neg_coef_t = None
+        self.neg_intercept = None
+        self.exp_limit = None
+        self.refresh()
+
+
+    def refresh(self):
+        """
+        Function that rebuilds the compiled arrays from the fitted coefficients of the model. Must be called after every partial_fit.
+        :return: Nothing.
+        """
+        self.neg_coef_t = np.ascontiguousarray(-self.clf.coef_.T) # Negated once here so that the logistic function needs no negation per call. Keeps the dtype of the model, as sklearn does.
+        self.neg_intercept = -self.clf.intercept_
+        self.exp_limit = float(np.floor(np.log(np.finfo(self.neg_coef_t.dtype).max))) # Largest exponent that does not overflow
+
+
+    def predict_proba(self, action_state_window):
+        """
+        Function that computes the probabilities of each action, mirroring SGDClassifier.predict_proba: a one-vs-rest logistic score per class, normalized over all classes.
+        :param action_state_window: Array of one or multiple rows containing the action history of the previous k rounds and the state of the players.
+        :return: Array of shape (rows, 5) with the probability of each action.
+        """
+        if not isinstance(action_state_window, np.ndarray) or action_state_window.ndim != 2:
+            action_state_window = np.asarray(action_state_window).reshape(-1, self.neg_coef_t.shape[0])
+        prob = action_state_window @ self.neg_coef_t # Logistic function 1 / (1 + exp(-score)) computed in place
+        prob += self.neg_intercept
+        np.minimum(prob, self.exp_limit, out=prob) # Overly confident scores stay at the smallest positive probability instead of zero, so a row never sums to zero (sklearn then falls back to uniform, as this does)
+        np.exp(prob, out=prob)
+        prob += 1
+        np.reciprocal(prob, out=prob)
+        prob /= prob.sum(axis=1, keepdims=True)
+        return prob
+
+
+    @staticmethod
+    def predict_proba_many(predictors, action_state_windows):
+        """
+        Function that computes the probabilities of many Adaptive models at once, each on its own row. Used when every game of a pool holds its own copy of the model.
+        :param predictors: List of LinearPredictor, one per row.
+        :param action_state_windows: Array with one action_state_window per row.
+        :return: Array of shape (rows, 5) with the probability of each action.
+        """
+        neg_coef_t = np.stack([predictor.neg_coef_t for predictor in predictors])
+        neg_intercept = np.stack([predictor.neg_intercept for predictor in predictors])
+        exp_limit = min(predictor.exp_limit for predictor in predictors)
+        prob = np.einsum("nf,nfk->nk", np.asarray(action_state_windows, dtype=neg_coef_t.dtype), neg_coef_t)
+        prob += neg_intercept
+        np.minimum(prob, exp_limit, out=prob)
+        np.exp(prob, out=prob)
+        prob += 1
+        np.reciprocal(prob, out=prob)
+        prob /= prob.sum(axis=1, keepdims=True)
+        return prob
+
+
+
+class TreeEnsemblePredictor:
+    """
+    Class TreeEnsemblePredictor, which compiles the GBC model (GradientBoostingClassifier, or HistGradientBoostingClassifier once trained incrementally) into flat NumPy arrays holding the feature, threshold, children and value of every node of every tree.
+    All the trees are walked at once for one row or a batch of rows, which replaces the pandas DataFrame and predict_proba call made on every move.
+    """
+    def __init__(self, model):
+        self.n_features = model.n_features_in_
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        depth = 0
+        offset = 0
+        if hasattr(model, "_predictors"): # HistGradientBoostingClassifier, whose leaf values already include the learning rate
+            self.n_stages, self.n_classes = len(model._predictors), model.n_trees_per_iteration_
+            self.dtype = np.float64 # Features are compared as float64 by the histogram-based booster
+            for stage in model._predictors:
+                for predictor in stage:
+                    nodes = predictor.nodes
+                    is_leaf = nodes["is_leaf"].astype(bool)
+                    node_ids = np.arange(nodes.shape[0]) + offset
+                    features.append(np.where(is_leaf, 0, nodes["feature_idx"]))
+                    thresholds.append(np.where(is_leaf, np.inf, nodes["num_threshold"]))
+                    lefts.append(np.where(is_leaf, node_ids, nodes["left"] + offset))
+                    rights.append(np.where(is_leaf, node_ids, nodes["right"] + offset))
+                    values.append(nodes["value"])
+                    roots.append(offset)
+                    depth = max(depth, int(nodes["depth"].max()))
+                    offset += nodes.shape[0]
+            self.init_raw = model._baseline_prediction[0]
+        else:
+            self.n_stages, self.n_classes = model.estimators_.shape
+            self.dtype = np.float32 # sklearn's trees compare float32 features
+            for stage in range(self.n_stages): # Trees are stored stage by stage, so that the values of a row can be summed in the same order as sklearn.
+                for k in range(self.n_classes):
+                    tree = model.estimators_[stage, k].tree_
+                    is_leaf = tree.children_left == -1
+                    node_ids = np.arange(tree.node_count) + offset
+                    features.append(np.where(is_leaf, 0, tree.feature))
+                    thresholds.append(np.where(is_leaf, np.inf, tree.threshold)) # Leaves point to themselves, so walking further down changes nothing.
+                    lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+                    rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+                    values.append(model.learning_rate * tree.value[:, 0, 0])
+                    roots.append(offset)
+                    depth = max(depth, tree.max_depth)
+                    offset += tree.node_count
+            with warnings.catch_warnings(): # The model was fitted on a DataFrame, but only the constant prediction of the init estimator is needed here.
+                warnings.simplefilter("ignore", UserWarning)
+                self.init_raw = model._raw_predict_init(np.zeros((1, self.n_features), dtype=np.float32))[0]
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.depth = depth
+
+
+    def predict_proba(self, action_state_window):
+        """
+        Function that computes the probabilities of each action, mirroring the predict_proba of the model.
+        :param action_state_window: Array of one or multiple rows containing the action history of the previous k rounds and the state of the players.
+        :return: Array of shape (rows, 5) with the probability of each action.
+        """
+        X = np.asarray(action_state_window, dtype=self.dtype).reshape(-1, self.n_features)
+        n = X.shape[0]
+        nodes = np.broadcast_to(self.roots, (n, self.roots.shape[0]))
+        row_start = (np.arange(n) * self.n_features)[:, None]
+        flat_X = X.ravel()
+        for _ in range(self.depth):
+            go_left = flat_X[row_start + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        # Leaf values laid out per stage after the init prediction, then summed stage by stage as sklearn does.
+        raw = np.empty((n, self.n_stages + 1, self.n_classes))
+        raw[:, 0] = self.init_raw
+        raw[:, 1:] = self.value[nodes].reshape(n, self.n_stages, self.n_classes)
+        raw = raw.sum(axis=1)
+
+        # Softmax, as computed by sklearn's multinomial loss.
+        raw -= raw.max(axis=1, keepdims=True)
+        np.exp(raw, out=raw)
+        raw /= raw.sum(axis=1, keepdims=True)
+        return raw
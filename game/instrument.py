@@ -0,0 +1,214 @@
+import functools
+import importlib
+import inspect
+import json
+import time
+
+# Phases timed when the instrumentation is enabled: name -> (module, class, method). Times are inclusive, so a phase also counts the phases it calls.
+PHASES = {
+    "game.play": ("game", "Game", "start_game"),
+    "game.step": ("game", "Game", "step"),
+    "game.observe": ("game", "Game", "observe"), # Includes the reversal of the window seen by player 1
+    "game.encode_sequence": ("game", "Game", "encode_sequence"),
+    "game.take_action": ("game", "Game", "take_action"),
+    "game.history_update": ("game", "Game", "history_update"),
+    "game.record": ("game", "DataLogger", "record"),
+    "game.data_save": ("game", "DataLogger", "data_GBC_save"),
+    "computer.load_model": ("computer", "Computer", "classifier_model"),
+    "computer.play": ("computer", "Computer", "play"),
+    "computer.decision": ("computer", "Computer", "decision"),
+    "computer.search": ("search", "Search", "best_action"),
+    "computer.model_update": ("computer", "Computer", "model_update"),
+    "computer.partial_fit": ("computer", "Computer", "fit"),
+    "computer.save": ("computer", "Computer", "save"),
+    "predictor.linear": ("inference", "LinearPredictor", "predict_proba"),
+    "predictor.linear_many": ("inference", "LinearPredictor", "predict_proba_many"),
+    "predictor.tree": ("inference", "TreeEnsemblePredictor", "predict_proba"),
+    "registry.get": ("registry", "ModelRegistry", "get"),
+    "registry.write": ("registry", "ModelRegistry", "write"),
+}
+
+
+class Metrics:
+    """
+    Class Metrics, which accumulates the number of calls, the total time and the longest call of every phase. Snapshots of several processes can be merged into one.
+    """
+    def __init__(self):
+        self.phases = {} # name -> [calls, total nanoseconds, longest call in nanoseconds]
+
+
+    def add(self, name, elapsed):
+        """
+        Function that accounts for one call of a phase.
+        :param name: Name of the phase.
+        :param elapsed: Duration of the call in nanoseconds.
+        :return: Nothing.
+        """
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [1, elapsed, elapsed]
+        else:
+            phase[0] += 1
+            phase[1] += elapsed
+            if elapsed > phase[2]:
+                phase[2] = elapsed
+
+
+    def merge(self, snapshot):
+        """
+        Function that adds the phases of a snapshot, e.g., taken in a worker process.
+        :param snapshot: Dictionary returned by snapshot().
+        :return: Nothing.
+        """
+        for name, (calls, total, longest) in snapshot.items():
+            phase = self.phases.setdefault(name, [0, 0, 0])
+            phase[0] += calls
+            phase[1] += total
+            phase[2] = max(phase[2], longest)
+
+
+    def snapshot(self):
+        """
+        Function that copies the accumulated phases, in a form that can be sent between processes.
+        :return: Dictionary of the calls, total nanoseconds and longest call of every phase.
+        """
+        return {name: list(phase) for name, phase in self.phases.items()}
+
+
+    def reset(self):
+        """
+        Function that clears the accumulated phases.
+        :return: Nothing.
+        """
+        self.phases.clear()
+
+
+METRICS = Metrics() # Metrics of the process
+_originals = {} # Methods replaced while the instrumentation is enabled: (class, method) -> original attribute
+
+
+def enabled():
+    """
+    Function that tells whether the instrumentation is enabled in this process.
+    :return: Boolean.
+    """
+    return bool(_originals)
+
+
+def timed(name, function):
+    """
+    Function that wraps a function so that every call is timed as a phase.
+    :param name: Name of the phase.
+    :param function: Function to time.
+    :return: The wrapped function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            METRICS.add(name, time.perf_counter_ns() - start)
+    return wrapper
+
+
+def enable(phases = None):
+    """
+    Function that enables the instrumentation, replacing the methods of the timed phases by timed wrappers. Nothing is timed, and nothing costs, until this is called.
+    :param phases: Names of the phases to time, or None for every phase of PHASES.
+    :return: Nothing.
+    """
+    for name in phases if phases is not None else PHASES:
+        module_name, class_name, method_name = PHASES[name]
+        cls = getattr(importlib.import_module(module_name), class_name)
+        if (cls, method_name) in _originals:
+            continue
+        original = inspect.getattr_static(cls, method_name)
+        _originals[(cls, method_name)] = original
+        if isinstance(original, staticmethod):
+            setattr(cls, method_name, staticmethod(timed(name, original.__func__)))
+        else:
+            setattr(cls, method_name, timed(name, original))
+
+
+def disable():
+    """
+    Function that restores the original methods. The accumulated metrics are kept.
+    :return: Nothing.
+    """
+    for (cls, method_name), original in _originals.items():
+        setattr(cls, method_name, original)
+    _originals.clear()
+
+
+def run_in_worker(function, *args):
+    """
+    Function that runs a task in a worker process with the instrumentation enabled, and returns the metrics of the task with its result.
+    :param function: Task run by the worker, e.g., runner.play_chunk.
+    :param args: Arguments of the task.
+    :return: Tuple of the result of the task and the snapshot of its metrics.
+    """
+    enable()
+    METRICS.reset()
+    result = function(*args)
+    return result, METRICS.snapshot()
+
+
+def collect(output):
+    """
+    Function that merges the metrics returned by a worker into the metrics of the process.
+    :param output: Tuple returned by run_in_worker.
+    :return: The result of the task.
+    """
+    result, snapshot = output
+    METRICS.merge(snapshot)
+    return result
+
+
+def pool_map(executor, function, *iterables):
+    """
+    Function that maps a task over a process pool like executor.map, aggregating the metrics of the workers into this process when the instrumentation is enabled.
+    :param executor: Process pool executor.
+    :param function: Task to map.
+    :param iterables: Arguments of the tasks.
+    :return: Iterator over the results of the tasks, in order.
+    """
+    if not enabled():
+        return executor.map(function, *iterables)
+    return map(collect, executor.map(functools.partial(run_in_worker, function), *iterables))
+
+
+def report():
+    """
+    Function that summarizes the accumulated metrics.
+    :return: Dictionary of the calls, total seconds, mean and longest call in microseconds of every phase, sorted by total time.
+    """
+    phases = sorted(METRICS.phases.items(), key=lambda item: -item[1][1])
+    return {name: {"calls": calls, "seconds": total / 1e9, "mean_us": total / calls / 1e3, "max_us": longest / 1e3} for name, (calls, total, longest) in phases}
+
+
+def export(path):
+    """
+    Function that writes the accumulated metrics to a file, in the Prometheus text format if the file ends with .prom, or as JSON otherwise.
+    :param path: Path of the file.
+    :return: Nothing.
+    """
+    with open(path, "w") as file:
+        if str(path).endswith(".prom"):
+            file.write(prometheus())
+        else:
+            json.dump(report(), file, indent=2)
+
+
+def prometheus():
+    """
+    Function that formats the accumulated metrics in the Prometheus text format.
+    :return: String of the metrics.
+    """
+    lines = ["# HELP dracs_phase_calls_total Number of calls of a phase.", "# TYPE dracs_phase_calls_total counter"]
+    lines += [f'dracs_phase_calls_total{{phase="{name}"}} {calls}' for name, (calls, _, _) in METRICS.phases.items()]
+    lines += ["# HELP dracs_phase_seconds_total Time spent in a phase, including the phases it calls.", "# TYPE dracs_phase_seconds_total counter"]
+    lines += [f'dracs_phase_seconds_total{{phase="{name}"}} {total / 1e9:.9f}' for name, (_, total, _) in METRICS.phases.items()]
+    lines += ["# HELP dracs_phase_max_seconds Longest call of a phase.", "# TYPE dracs_phase_max_seconds gauge"]
+    lines += [f'dracs_phase_max_seconds{{phase="{name}"}} {longest / 1e9:.9f}' for name, (_, _, longest) in METRICS.phases.items()]
+    return "\n".join(lines) + "\n"
@@ -1,12 +1,19 @@
 import math
+import sys
 
 from computer import Computer
+from engine import BatchGame, POLICIES
 from game import Game
 from config import UserRefusedTraining
 from player import Player
 from config import Config
+from registry import REGISTRY
+from runner import game_seed, generate_training_data, run_games, train_adaptive
+from scheduler import GamePool, ML_MODELS
+from stopping import SequentialStop, play_until_stopped
 
 cfg = Config() # Object of the class Config, which holds core configuration for the game
+ASSESS_PAIRINGS = [["RANDOM","SIMPLE"], ["RANDOM", "ADAPTIVE"], ["RANDOM","GBC"], ["SIMPLE", "ADAPTIVE"],["SIMPLE", "GBC"], ["GBC", "ADAPTIVE"]] # Pairings of the Predictive Algorithm Assessment
 
 def start_screen():
     """
@@ -155,8 +162,7 @@ def diff_selection(auto_choice = False, choice_diff = None):
         case "3" | "ADAPTIVE" | "A" | "ADAPT":
             model_existence("ADAPTIVE")
             return "ADAPTIVE"
-        case "4" | "STRATEGIST" | "S" | "STRAT": #TODO
-            print("Strategist is not currently implemented.\nDefaulting to Random.")
+        case "4" | "STRATEGIST" | "S" | "STRAT": # Solved automatically if its policy does not exist yet
             return "STRATEGIST"
         case "5" | "GBC":
             model_existence("GBC")
@@ -197,35 +203,9 @@ def ai_vs_ai():
             cpu_name_p1 = diff_selection(True, "2")
             cpu_name_p2 = diff_selection(True, "3")
 
-        # Precomputes game tracking structure.
-        inc_cell_num = math.ceil((-10+math.sqrt(100-4*(-20*game_number)))/20) # Number of total "cells" to generate, where every cell contains 10 more games than the last (e.g., 100 games = 4 cells each containing 10, 20, 30, and 40 games respectively.
-        inc_win_count = [[0,0,0,0] for _ in range(inc_cell_num)] # Creates the respective amount of cells necessary
-        prediction = [0,0]
-        game_count = 10 # Tracker for how many games there should be in each cell.
-        multi_number_game = 0 # Tracker for the sum of games played in total.
-
         # Simulation loop
-        for i in range(game_number):
-            if i % 100 == 0:
-                print(f"Game Number Progress: {i} out of {game_number}")
-            if i == game_count+multi_number_game:
-                inc_win_count[int(game_count / 10 - 1)][3] = inc_win_count[int(game_count / 10 - 1)][1]/game_count
-                multi_number_game += game_count
-                game_count += 10
-
-            computer_1 = Computer(cfg, cpu_name_p1)
-            computer_2 = Computer(cfg, cpu_name_p2)
-            game = Game(cfg, computer_1, computer_2)
-            prediction[0] += game.acc_prediction
-            prediction[1] += game.innac_prediction
-
-            # Increase the count for the AI model that won or if they tied, at its respective location within a cell.
-            if game.winner == 1:
-                inc_win_count[int(game_count / 10 - 1)][0] += 1
-            elif game.winner == 2:
-                inc_win_count[int(game_count / 10 - 1)][1] += 1
-            elif game.winner == 0:
-                inc_win_count[int(game_count / 10 - 1)][2] += 1
+        winners, prediction, _ = play_series(cpu_name_p1, cpu_name_p2, game_number)
+        inc_win_count = winning_board(winners, len(winners))
 
         # Sums the total number of wins for each AI model and the number of ties.
         win_count = [0,0,0]
@@ -239,6 +219,7 @@ def ai_vs_ai():
         print(f"Correct Prediction: {prediction[0]}\nIncorrect Prediction: {prediction[1]}")
         print(f"Successful Prediction (Ratio): {(prediction[0] / (prediction[0] + prediction[1])) * 100}%\n")
         cfg.set_config(action_viewer=True)
+        REGISTRY.flush() # End of the run, writes the models still awaiting a checkpoint
 
     except ValueError:
         print("Invalid value!\n")
@@ -247,7 +228,7 @@ def ai_vs_ai():
 
 def training_set(auto_GBC = False):
     """
-    Function to create the core basic model, i.e., the Adaptive model, and the training set for the GBC model.
+    Function to create and train the core basic model, i.e., the Adaptive model, and the training set for the GBC model.
     :param auto_GBC: If true, the option to train for the GBC model is automatically set to true and will occur, without the user's choice.
     :return: Nothing.
     """
@@ -262,20 +243,33 @@ def training_set(auto_GBC = False):
         print("About to automatically train for GBC.")
         input("Press Enter to continue...")
         training_game = True
+    train_models(training_game)
+    cfg.set_config(action_viewer = True)
+
 
+
+def train_models(training_game):
+    """
+    Function that trains the models without any prompt: generates the training set and trains the GBC model if asked, then trains the Adaptive model. Used by the training option and the command line interface.
+    :param training_game: If true, the training set of the GBC model is generated and the GBC model is trained on it.
+    :return: Nothing.
+    """
     # Switches the AI model's perspective during game recording and saving.
     computer_names_1 = ["RANDOM","SIMPLE"]
     computer_names_2 = ["SIMPLE_2","RANDOM_2"]
-    game_number = 2000
 
-    # Main training loop
-    for i in range(game_number):
-        computer_1 = Computer(cfg, computer_names_1[i%2])
-        computer_2 = Computer(cfg, computer_names_2[i%2])
-        Game(cfg, computer_1, computer_2, training_game)
-        if i % 100 == 0:
-            print(f"Game Number Progress: {i} out of {game_number}")
-    cfg.set_config(action_viewer = True)
+    # Main training loop, the games are played by the batch engine in shards spread across the workers.
+    if training_game:
+        generate_training_data(cfg, computer_names_1, computer_names_2, cfg.training_games, cfg.workers, cfg.base_seed)
+        from trainer import train_gbc # sklearn is only loaded for training
+
+        train_gbc(cfg) # Only fits the rows just added, if the GBC model already exists
+    Computer(cfg, computer_names_2[0]).save() # Creates the Adaptive model if it does not exist yet
+
+    # Trains the Adaptive model against every AI model it learns from, itself included, with its parameters merged across the workers.
+    if cfg.adaptive_training_games > 0:
+        train_adaptive(cfg, ["RANDOM", "SIMPLE", "ADAPTIVE"], cfg.adaptive_training_games, cfg.workers, cfg.sync_games, cfg.base_seed)
+    REGISTRY.flush() # End of the run, writes the models still awaiting a checkpoint
 
 
 
@@ -290,7 +284,7 @@ def predictive_assess():
     model_existence("ADAPTIVE")
 
     overall_result = []
-    ai_types = [["RANDOM","SIMPLE"], ["RANDOM", "ADAPTIVE"], ["RANDOM","GBC"], ["SIMPLE", "ADAPTIVE"],["SIMPLE", "GBC"], ["GBC", "ADAPTIVE"]]
+    ai_types = ASSESS_PAIRINGS
 
     # Input and options
     try:
@@ -305,35 +299,13 @@ def predictive_assess():
         else:
             cfg.set_config(action_viewer = False)
 
-        # Precomputes game tracking structure.
-        inc_cell_num = math.ceil((-10 + math.sqrt(100 - 4 * (-20 * game_number))) / 20) # Calculates the number of cells required for each game, increasing by 10
         for u in range(len(ai_types)):
             print(f"\nStarting Fight Between {ai_types[u][0]} and {ai_types[u][1]}")
             overall_result.append(f"Fight Between {ai_types[u][0]} and {ai_types[u][1]}\n")
-            inc_win_count = [[0, 0, 0, 0] for _ in range(inc_cell_num)]
-            prediction = [0, 0]
-            game_count = 10
-            multi_number_game = 0
 
             # Simulation loop
-            for i in range(game_number):
-                if i % 100 == 0:
-                    print(f"Game Number Progress: {i} out of {game_number}")
-                if i == game_count + multi_number_game:
-                    inc_win_count[int(game_count / 10 - 1)][3] = inc_win_count[int(game_count / 10 - 1)][1] / game_count
-                    multi_number_game += game_count
-                    game_count += 10
-
-                computer_1 = Computer(cfg, ai_types[u][0])
-                computer_2 = Computer(cfg, ai_types[u][1])
-                game = Game(cfg, computer_1, computer_2)
-                prediction[0] += game.acc_prediction
-                prediction[1] += game.innac_prediction
-
-                # Increase the count for the AI model that won or if they tied, at its respective location within a cell.
-                if game.winner == 1: inc_win_count[int(game_count / 10 - 1)][0] += 1
-                elif game.winner == 2: inc_win_count[int(game_count / 10 - 1)][1] += 1
-                elif game.winner == 0: inc_win_count[int(game_count / 10 - 1)][2] += 1
+            winners, prediction, _ = play_series(ai_types[u][0], ai_types[u][1], game_number)
+            inc_win_count = winning_board(winners, len(winners))
 
             # Sums the total number of wins for each AI model and the number of ties.
             win_count = [0, 0, 0]
@@ -351,11 +323,95 @@ def predictive_assess():
         for i in range(len(overall_result)):
             print(overall_result[i])
         cfg.set_config(action_viewer = True)
+        REGISTRY.flush() # End of the run, writes the models still awaiting a checkpoint
 
     except ValueError:
         print("Invalid value!\n")
 
 
+def play_series(cpu_name_p1, cpu_name_p2, game_number):
+    """
+    Function that plays a series of games between two AI models, stopped early according to cfg.early_stop once the result is precise enough, in which case the games saved are displayed.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2.
+    :param game_number: Largest number of games to play.
+    :return: List of the winner of each game in the order they were played, the list of correct and incorrect predictions made by player 2, and the summary of the early stop (None if it is off).
+    """
+    if cfg.early_stop == "OFF":
+        winners, prediction = play_games(cpu_name_p1, cpu_name_p2, game_number)
+        return winners, prediction, None
+    stopper = SequentialStop(cfg.early_stop, game_number, cfg.stop_ci_width, cfg.stop_sprt_delta, cfg.stop_alpha, cfg.stop_beta, cpu_name_p2 in ML_MODELS)
+    winners, prediction = play_until_stopped(lambda batch, first_game: play_games(cpu_name_p1, cpu_name_p2, batch, first_game), stopper, cfg.stop_batch)
+    print(f"Stopped after {stopper.games} out of {game_number} games ({stopper.reason}), {game_number - stopper.games} games saved.")
+    return winners, prediction, stopper.summary()
+
+
+
+def play_games(cpu_name_p1, cpu_name_p2, game_number, first_game = 0):
+    """
+    Function that plays a series of games between two AI models. When neither model needs a Computer (i.e., Random and Simple), and the actions are not displayed, all the games are played at once by the batch engine.
+    When workers is above 1 or a base seed is given, the games are seeded and played by the multiprocess runner, which keeps the learning of the Adaptive model (see runner.run_games).
+    When an ML model plays and pool_size is above 1, the games are advanced together by the GamePool scheduler.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2.
+    :param game_number: Number of games to play.
+    :param first_game: Index of the first game of the series, so that a seeded series played in several calls does not replay the same games.
+    :return: List of the winner of each game in the order they were played, and the list of correct and incorrect predictions made by player 2.
+    """
+    if not cfg.action_viewer and cpu_name_p1 in POLICIES and cpu_name_p2 in POLICIES:
+        seed = cfg.base_seed if cfg.base_seed is None or first_game == 0 else game_seed(cfg.base_seed, first_game)
+        batch = BatchGame(cfg, cpu_name_p1, cpu_name_p2, game_number, seed=seed)
+        winners = batch.run().tolist()
+        return winners, [batch.acc_prediction, batch.innac_prediction]
+    if cfg.workers > 1 or cfg.base_seed is not None: # Reproducible run, possibly spread across worker processes
+        return run_games(cfg, cpu_name_p1, cpu_name_p2, game_number, cfg.workers, cfg.chunk_size, cfg.base_seed or 0, first_game)
+    if not cfg.action_viewer and cfg.pool_size > 1 and (cpu_name_p1 in ML_MODELS or cpu_name_p2 in ML_MODELS): # Predictions of the ML models are batched across a pool of games
+        return GamePool(cfg, cpu_name_p1, cpu_name_p2, game_number, cfg.pool_size).run()
+
+    winners = []
+    prediction = [0,0]
+    for i in range(game_number):
+        if i % 100 == 0:
+            print(f"Game Number Progress: {i} out of {game_number}")
+        computer_1 = Computer(cfg, cpu_name_p1)
+        computer_2 = Computer(cfg, cpu_name_p2)
+        game = Game(cfg, computer_1, computer_2)
+        prediction[0] += game.acc_prediction
+        prediction[1] += game.innac_prediction
+        winners.append(game.winner)
+    return winners, prediction
+
+
+
+def winning_board(winners, game_number):
+    """
+    Function that builds the "Winning Board" from the winners of a series of games. Every cell contains 10 more games than the last (e.g., 100 games = 4 cells each containing 10, 20, 30, and 40 games respectively),
+    and holds the wins of player 1, the wins of player 2, the ties, and the ratio of wins of player 2 once the cell is complete.
+    :param winners: List of the winner of each game in the order they were played.
+    :param game_number: Number of games played.
+    :return: List of the cells of the winning board.
+    """
+    inc_cell_num = math.ceil((-10+math.sqrt(100-4*(-20*game_number)))/20) # Number of total "cells" to generate
+    inc_win_count = [[0,0,0,0] for _ in range(inc_cell_num)] # Creates the respective amount of cells necessary
+    game_count = 10 # Tracker for how many games there should be in each cell.
+    multi_number_game = 0 # Tracker for the sum of games played in total.
+    for i in range(len(winners)):
+        if i == game_count+multi_number_game:
+            inc_win_count[int(game_count / 10 - 1)][3] = inc_win_count[int(game_count / 10 - 1)][1]/game_count
+            multi_number_game += game_count
+            game_count += 10
+
+        # Increase the count for the AI model that won or if they tied, at its respective location within a cell.
+        if winners[i] == 1:
+            inc_win_count[int(game_count / 10 - 1)][0] += 1
+        elif winners[i] == 2:
+            inc_win_count[int(game_count / 10 - 1)][1] += 1
+        elif winners[i] == 0:
+            inc_win_count[int(game_count / 10 - 1)][2] += 1
+    return inc_win_count
+
+
+
 def model_existence(model_name):
     """
     Function to check whether an AI model exists or not before initiating the game.
@@ -374,5 +430,14 @@ def model_existence(model_name):
 
 # Function to start the program
 if __name__ == '__main__':
-    start_screen()
-    exit()
\ No newline at end of file
+    if len(sys.argv) > 1: # Arguments run the command line interface, without any prompt
+        from cli import cli
+
+        sys.exit(cli(sys.argv[1:]))
+    try:
+        start_screen()
+    except KeyboardInterrupt:
+        print("\nInterrupted. Saving models before exiting.")
+    finally:
+        REGISTRY.flush()
+    exit()
@@ -1,5 +1,7 @@
 
 class Player:
+    __slots__ = ("cfg", "health_points", "mana_points", "name") # No per-instance dictionary, millions of players are created by long simulations
+
     def __init__(self, cfg, name):
         self.cfg = cfg
         self.health_points = cfg.max_health_points
@@ -0,0 +1,165 @@
+import atexit
+import os
+import tempfile
+import time
+
+
+class ModelRegistry:
+    """
+    Class ModelRegistry, which keeps every loaded AI model in memory so that it is only deserialized once per process.
+    Models are keyed by the model signature of the configuration and the core name of the model, and are reloaded only when the file on disk changes.
+    """
+    def __init__(self):
+        self.entries = {} # (model signature, model name) -> [path, file stamp, model, compiled predictor]
+        self.dirty = set() # Keys of the models updated in memory but not yet written to disk
+        self.games_since_checkpoint = 0
+        self.last_checkpoint = time.monotonic()
+
+
+    def file_stamp(self, path):
+        """
+        Function that returns a stamp identifying the current version of a model file on disk.
+        :param path: Path of the model file.
+        :return: Tuple of the modification time and size of the file, or None if the file does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+    def get(self, cfg, model_name):
+        """
+        Function that returns the shared model for the current configuration, loading it from disk only if it was never loaded or if the file changed since.
+        :param cfg: Object of the class Config.
+        :param model_name: The core name of the model.
+        :return: The loaded model, or None if the model has not been loaded and does not exist on disk.
+        """
+        key = (cfg.model_sig(), model_name)
+        path = cfg.model_query(model_name)
+        stamp = self.file_stamp(path)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == path and entry[1] == stamp:
+            return entry[2] # Model in memory is up-to-date with the file on disk, or has not been written to disk yet.
+        if stamp is None: # The file was removed since it was loaded, or never existed.
+            self.entries.pop(key, None)
+            return None
+        import joblib # Only loaded with the first model, so games without ML models start fast
+
+        model = joblib.load(path)
+        self.entries[key] = [path, stamp, model, None]
+        return model
+
+
+    def put(self, cfg, model_name, model):
+        """
+        Function that stores a model created or updated in memory as the shared model for the current configuration.
+        :param cfg: Object of the class Config.
+        :param model_name: The core name of the model.
+        :param model: The model to store.
+        :return: Nothing.
+        """
+        key = (cfg.model_sig(), model_name)
+        path = cfg.model_query(model_name)
+        entry = self.entries.get(key)
+        stamp = entry[1] if entry is not None and entry[0] == path else self.file_stamp(path)
+        self.entries[key] = [path, stamp, model, None]
+
+
+    def compiled(self, cfg, model_name, compiler):
+        """
+        Function that returns the compiled predictor of a shared model, compiling it only once per loaded version of the model.
+        :param cfg: Object of the class Config.
+        :param model_name: The core name of the model.
+        :param compiler: Callable building the compiled predictor from the model.
+        :return: The compiled predictor, or None if the model does not exist.
+        """
+        model = self.get(cfg, model_name)
+        if model is None:
+            return None
+        entry = self.entries[(cfg.model_sig(), model_name)]
+        if entry[3] is None:
+            entry[3] = compiler(model)
+        return entry[3]
+
+
+    def dump(self, cfg, model_name):
+        """
+        Function that writes the shared model to disk, and records the new file stamp so that the registry does not reload its own write.
+        :param cfg: Object of the class Config.
+        :param model_name: The core name of the model.
+        :return: Nothing.
+        """
+        self.write((cfg.model_sig(), model_name))
+
+
+    def write(self, key):
+        """
+        Function that atomically writes a model to disk, by dumping it to a temporary file in the models' directory and renaming it over the model file.
+        A run interrupted mid-write therefore never leaves a truncated model behind.
+        :param key: Key of the model in the registry.
+        :return: Nothing.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        import joblib
+
+        path = entry[0]
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                joblib.dump(entry[2], file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        entry[1] = self.file_stamp(path)
+        self.dirty.discard(key)
+
+
+    def checkpoint(self, cfg, model_name):
+        """
+        Function called at the end of every game that updated a model. Marks the model as modified and writes every modified model to disk when the checkpoint policy of the configuration is due.
+        :param cfg: Object of the class Config.
+        :param model_name: The core name of the model.
+        :return: Nothing.
+        """
+        if cfg.checkpoint_mode == "OFF": # The model stays in memory only, e.g., the local copy of a training worker
+            return
+        self.dirty.add((cfg.model_sig(), model_name))
+        self.games_since_checkpoint += 1
+        match cfg.checkpoint_mode:
+            case "GAMES":
+                due = self.games_since_checkpoint >= cfg.checkpoint_interval
+            case "SECONDS":
+                due = time.monotonic() - self.last_checkpoint >= cfg.checkpoint_interval
+            case _: # "END", models are only written when the run is flushed.
+                due = False
+        if due:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Function that writes every model modified since the last checkpoint to disk. Called at the end of a run, and on exit so that no learning is lost.
+        :return: Nothing.
+        """
+        for key in list(self.dirty):
+            self.write(key)
+        self.games_since_checkpoint = 0
+        self.last_checkpoint = time.monotonic()
+
+
+    def clear(self):
+        """
+        Function that empties the registry, forcing every model to be reloaded from disk on its next use.
+        :return: Nothing.
+        """
+        self.entries.clear()
+
+
+
+REGISTRY = ModelRegistry() # Registry shared by every Computer of the process
+atexit.register(REGISTRY.flush) # Writes any pending checkpoint when the program exits, including after a Ctrl-C
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Class ReplayBuffer, which holds the last rows seen by the Adaptive model in preallocated arrays, so that its updates can be applied in mini-batches instead of one row per round.
+    Rows are copied in on arrival, since the action_state_window of a round is not kept by the game.
+    """
+    def __init__(self, capacity, n_features, sampling = "FIFO"):
+        self.capacity = capacity
+        self.sampling = sampling
+        self.features = np.zeros((capacity, n_features), dtype=np.float32)
+        self.labels = np.zeros(capacity, dtype=np.int64)
+        self.size = 0 # Rows held, up to the capacity
+        self.next = 0 # Position of the next row, the oldest row being overwritten once the buffer is full
+        self.pending = 0 # Rows added since the last mini-batch
+
+
+    def add(self, action_state_window, label):
+        """
+        Function that copies a row in the buffer.
+        :param action_state_window: Array containing the action history of the previous k rounds and the state of the players.
+        :param label: True action taken by the opposing player, from 0 to 4.
+        :return: Nothing.
+        """
+        self.features[self.next] = np.asarray(action_state_window).reshape(-1)
+        self.labels[self.next] = label
+        self.next = (self.next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.pending = min(self.pending + 1, self.capacity)
+
+
+    def batch(self):
+        """
+        Function that builds the next mini-batch, as many rows as were added since the previous one.
+        "FIFO" gives the new rows in their order of arrival, and "UNIFORM" draws the rows uniformly, with replacement, among every row held, replaying older rounds.
+        :return: Tuple of the feature matrix and the label vector of the mini-batch.
+        """
+        match self.sampling:
+            case "UNIFORM":
+                index = np.random.randint(0, self.size, self.pending)
+            case _: # "FIFO"
+                index = (self.next - self.pending + np.arange(self.pending)) % self.capacity
+        self.pending = 0
+        return self.features[index], self.labels[index]
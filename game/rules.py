@@ -0,0 +1,185 @@
+from functools import lru_cache
+import numpy as np
+
+ACTION_COSTS = (0, 0, 0, 1, 3) # Instant mana cost of Attack, Defend, Rest, Counter and Steal
+
+
+def resolve_round(state, actions, max_health_points, max_mana_points):
+    """
+    Function that resolves one round of DRACS in plain Python, following the rules of the game. It is the single reference implementation of the rules, from which the transition table is built.
+    Instant outcomes (mana costs, and the mana lost by an attacker whose attack is defended) are applied first. Timed outcomes are gathered in a stats box and distributed at the end, a player whose mana would fall in the negative losing health points instead.
+    :param state: State of the players before their actions are paid, (hp1, hp2, mp1, mp2).
+    :param actions: Actions of player 1 and player 2, from 1 to 5.
+    :param max_health_points: Maximum health points of a player.
+    :param max_mana_points: Maximum mana points of a player.
+    :return: State of the players at the end of the round, (hp1, hp2, mp1, mp2).
+    """
+    health_points = [state[0], state[1]]
+    mana_points = [state[2] - ACTION_COSTS[actions[0] - 1], state[3] - ACTION_COSTS[actions[1] - 1]]
+    stats_box = [0, 0, 0, 0] # (hp1, hp2, mp1, mp2)
+    for player_turn in range(2):
+        opp = 1 - player_turn
+        match actions[player_turn]:
+            case 1: # Attack
+                stats_box[opp] += -1
+            case 2: # Defend
+                if actions[opp] == 1:
+                    mana_points[opp] = max(mana_points[opp] - 1, 0) # The attacker instantly loses one mana point
+                    stats_box[player_turn] += 1
+            case 3: # Rest
+                stats_box[player_turn + 2] += 2
+            case 4: # Counter
+                if actions[opp] == 1:
+                    stats_box[player_turn] += 1
+                    stats_box[opp] += -1
+            case 5: # Steal
+                match actions[opp]:
+                    case 1: # Attack
+                        stats_box[player_turn] += 1
+                        stats_box[opp] += -1
+                    case 2: # Defend
+                        stats_box[opp + 2] += -1
+                        if mana_points[opp] > 0:
+                            stats_box[player_turn + 2] += 1
+                    case 3: # Rest
+                        stats_box[player_turn] += 1
+                        stats_box[opp] += -1
+                        stats_box[player_turn + 2] += 1
+                        stats_box[opp + 2] += -1
+                    case 4: # Counter
+                        stats_box[player_turn] += 1
+                        stats_box[opp] += -1
+                        if mana_points[opp] > 0:
+                            stats_box[player_turn + 2] += 1
+                            stats_box[opp + 2] += -1
+                    case 5: # Steal
+                        pass # Nothing occurs
+
+    for i in range(2):
+        health_points[i] = min(health_points[i] + stats_box[i], max_health_points)
+    for i in range(2):
+        mana_points[i] = min(mana_points[i] + stats_box[i + 2], max_mana_points)
+        if mana_points[i] < 0:
+            mana_points[i] = 0
+            health_points[i] = min(health_points[i] + stats_box[i + 2], max_health_points)
+    return health_points[0], health_points[1], mana_points[0], mana_points[1]
+
+
+@lru_cache(maxsize=None)
+def legal_actions(max_mana_points):
+    """
+    Function that builds the mask of the actions a player can afford.
+    :param max_mana_points: Maximum mana points of a player.
+    :return: Boolean array of shape (mp, 5), True where the action can be played with that many mana points.
+    """
+    mana_points = np.arange(max_mana_points + 1)[:, None]
+    return mana_points >= np.array(ACTION_COSTS)[None, :]
+
+
+class StateCodec:
+    """
+    Class StateCodec, which packs the state of a game, (hp1, hp2, mp1, mp2) and a turn or round count, into a single integer.
+    The state occupies the low digits in the order of the axes of the lookup tables, so the code of a state with a turn of 0 is its row in a table flattened by flat(), and the full code is its row in a table with a leading turn axis, such as the Strategist policy.
+    Codes are small integers, cheap to hash and compare, and serve as keys of the caches built over the states.
+    """
+    __slots__ = ("shape", "states", "strides")
+
+    def __init__(self, max_health_points, max_mana_points):
+        H, M = max_health_points + 1, max_mana_points + 1
+        self.shape = (H, H, M, M)
+        self.states = H * H * M * M # Number of states, i.e., the span of one turn
+        self.strides = (H * M * M, M * M, M)
+
+
+    def pack(self, state, turn = 0):
+        """
+        Function that packs a state into its code.
+        :param state: State of the players, (hp1, hp2, mp1, mp2).
+        :param turn: Turn or round count, the most significant digit of the code.
+        :return: Integer code of the state.
+        """
+        return turn * self.states + state[0] * self.strides[0] + state[1] * self.strides[1] + state[2] * self.strides[2] + state[3]
+
+
+    def flat(self, table, turns = False):
+        """
+        Function that views a lookup table indexed by state as indexed by code.
+        :param table: Array of shape (hp1, hp2, mp1, mp2, ...), or (turn, hp1, hp2, mp1, mp2, ...) with turns.
+        :param turns: Boolean indicating if the table has a leading turn axis.
+        :return: View of the table of shape (codes, ...).
+        """
+        lead = 5 if turns else 4
+        return table.reshape((-1,) + table.shape[lead:])
+
+
+
+@lru_cache(maxsize=None)
+def state_codec(max_health_points, max_mana_points):
+    """
+    Function that gives the state codec of a (hp, mp) configuration, shared by every game of the process.
+    :param max_health_points: Maximum health points of a player.
+    :param max_mana_points: Maximum mana points of a player.
+    :return: Object of the class StateCodec.
+    """
+    return StateCodec(max_health_points, max_mana_points)
+
+
+@lru_cache(maxsize=None)
+def transition_table(max_health_points, max_mana_points):
+    """
+    Function that enumerates every state and pair of actions once, and stores the resulting state in a lookup table. Cached, so the table is only built once per (hp, mp) configuration.
+    :param max_health_points: Maximum health points of a player.
+    :param max_mana_points: Maximum mana points of a player.
+    :return: Read-only array of shape (hp1, hp2, mp1, mp2, action 1, action 2, 4) holding the next (hp1, hp2, mp1, mp2), indexed by the state before the actions are paid and the actions minus 1.
+             Pairs of actions that one of the players cannot afford are filled with -1.
+    """
+    H, M = max_health_points + 1, max_mana_points + 1
+    legal = legal_actions(max_mana_points)
+    table = np.full((H, H, M, M, 5, 5, 4), -1, dtype=np.int8)
+    for state in np.ndindex(H, H, M, M):
+        for a1 in range(5):
+            if not legal[state[2], a1]:
+                continue
+            for a2 in range(5):
+                if legal[state[3], a2]:
+                    table[state + (a1, a2)] = resolve_round(state, (a1 + 1, a2 + 1), max_health_points, max_mana_points)
+    table.flags.writeable = False # Shared by every game of the process
+    return table
+
+
+@lru_cache(maxsize=None)
+def expected_value_table(max_health_points, max_mana_points, ev_weights):
+    """
+    Function that precomputes the expected value of every action of an AI model, for every state, player and predicted action of the opponent.
+    The expected value of an action is w_hp * (hp lost by the opponent - hp lost by the player) + w_mp * (mp lost by the opponent - mp lost by the player) + w_term * (1 if the opponent dies alone, -1 if the player dies, 0 otherwise).
+    Cached per set of weights, so changing the weights builds a new table.
+    :param max_health_points: Maximum health points of a player.
+    :param max_mana_points: Maximum mana points of a player.
+    :param ev_weights: Weights (w_hp, w_mp, w_term) of the hp difference, mp difference and end of the game.
+    :return: Tuple of the read-only expected values, of shape (hp1, hp2, mp1, mp2, player number, predicted action, action) with -inf where either action cannot be afforded,
+             and of the best action, from 1 to 5, of shape (hp1, hp2, mp1, mp2, player number, predicted action).
+    """
+    w_hp, w_mp, w_term = ev_weights
+    H, M = max_health_points + 1, max_mana_points + 1
+    legal = legal_actions(max_mana_points)
+    table = transition_table(max_health_points, max_mana_points).astype(np.float64)
+    hp1, hp2, mp1, mp2 = np.ix_(np.arange(H), np.arange(H), np.arange(M), np.arange(M))
+    current = [x[..., None, None] for x in (hp1, hp2, mp1, mp2)] # Broadcast over the pair of actions
+    expected_values = np.empty((H, H, M, M, 2, 5, 5))
+    for player_number in range(2):
+        opp = 1 - player_number
+        outcome = table.swapaxes(4, 5) if player_number == 0 else table # (predicted action, action) of the player
+        delta_health = [current[i] - outcome[..., i] for i in range(2)]
+        delta_mana = [current[i + 2] - outcome[..., i + 2] for i in range(2)]
+        health_points = outcome[..., :2]
+        end = np.where((health_points[..., 0] == 0) & (health_points[..., 1] == 0), -1, np.where(health_points[..., opp] == 0, 1, np.where(health_points[..., player_number] == 0, -1, 0)))
+        values = w_hp * (delta_health[opp] - delta_health[player_number]) + w_mp * (delta_mana[opp] - delta_mana[player_number]) + w_term * end
+        own_shape, opp_shape = [1, 1, 1, 1, 1, 5], [1, 1, 1, 1, 5, 1] # Affordable actions of each player, laid along the mana axis of that player
+        own_shape[2 + player_number], opp_shape[2 + opp] = M, M
+        affordable = legal.reshape(own_shape)
+        predictable = legal.reshape(opp_shape)
+        expected_values[:, :, :, :, player_number] = np.where(affordable & predictable, values, -np.inf)
+    best_actions = expected_values.argmax(axis=-1) + 1 # First best action on ties, as the loop of Computer.decision did
+    expected_values.flags.writeable = False
+    best_actions.flags.writeable = False
+    return expected_values, best_actions
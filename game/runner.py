@@ -0,0 +1,296 @@
+import dataclasses
+import functools
+import numpy as np
+import os
+import random
+import shutil
+import time
+
+from computer import Computer
+from dataset import merge_binary
+from engine import BatchGame
+from game import DataLogger, Game
+from instrument import pool_map
+from registry import REGISTRY
+
+SHARD_BATCH = 10000 # Games played at once by the batch engine within a shard, bounding the memory used by the recorded rows
+
+
+def game_seed(base_seed, index):
+    """
+    Function that derives the seed of one game from the base seed of the run, independently of which worker plays the game.
+    :param base_seed: Base seed of the run.
+    :param index: Index of the game in the series.
+    :return: Integer seed of the game.
+    """
+    return int(np.random.SeedSequence([base_seed, index]).generate_state(1)[0])
+
+
+def play_chunk(cfg, cpu_name_p1, cpu_name_p2, base_seed, indices):
+    """
+    Function that plays a chunk of games, either in a worker process or in the current process. Every game reseeds random and NumPy from its derived seed.
+    Unless cfg.persist_learning is True (a single process learning game after game), every game starts from the model saved on disk when the run started.
+    :param cfg: Object of the class Config, as sent to the worker.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2.
+    :param base_seed: Base seed of the run.
+    :param indices: Indices of the games to play.
+    :return: List of the winner, correct predictions and incorrect predictions of each game, in the order of indices.
+    """
+    results = []
+    for index in indices:
+        seed = game_seed(base_seed, index)
+        random.seed(seed)
+        np.random.seed(seed)
+        computer_1 = Computer(cfg, cpu_name_p1)
+        computer_2 = Computer(cfg, cpu_name_p2)
+        game = Game(cfg, computer_1, computer_2)
+        results.append((game.winner, game.acc_prediction, game.innac_prediction))
+    return results
+
+
+def learn_chunk(cfg, cpu_name_p1, cpu_name_p2, base_seed, indices):
+    """
+    Function that plays a chunk of games as play_chunk does, every game starting from the Adaptive model saved on disk when the run started, and sums the updates learned by the Adaptive model of player 2 in each game.
+    :param cfg: Object of the class Config, as sent to the worker.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2, "ADAPTIVE".
+    :param base_seed: Base seed of the run.
+    :param indices: Indices of the games to play.
+    :return: Tuple of the results of play_chunk, and of the summed changes of the coefficients, intercepts and number of updates of the Adaptive model.
+    """
+    start = REGISTRY.get(cfg, "ADAPTIVE")
+    coef, intercept, t = np.zeros_like(start.coef_), np.zeros_like(start.intercept_), 0.0
+    results = []
+    for index in indices:
+        seed = game_seed(base_seed, index)
+        random.seed(seed)
+        np.random.seed(seed)
+        computer_2 = Computer(cfg, cpu_name_p2)
+        game = Game(cfg, Computer(cfg, cpu_name_p1), computer_2)
+        results.append((game.winner, game.acc_prediction, game.innac_prediction))
+        coef += computer_2.clf.coef_ - start.coef_
+        intercept += computer_2.clf.intercept_ - start.intercept_
+        t += computer_2.clf.t_ - start.t_
+    return results, coef, intercept, t
+
+
+def run_games(cfg, cpu_name_p1, cpu_name_p2, game_number, workers = 1, chunk_size = 100, base_seed = 0, first_game = 0):
+    """
+    Function that plays a series of games between two AI models across a pool of worker processes. The games are split in chunks of consecutive indices, and the results are merged back in the original game order,
+    so a run gives bit-identical results whatever the number of workers or the chunk size.
+    When the Adaptive model plays player 2 and learning is persisted, a single process learns game after game as in an unseeded run. Across workers, every game starts from the model saved when the run started,
+    and the updates of all the games are added to the model at the end of the run, so no learning is lost but the model does not improve within the run.
+    :param cfg: Object of the class Config.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2.
+    :param game_number: Number of games to play.
+    :param workers: Number of worker processes, 1 plays every chunk in the current process.
+    :param chunk_size: Number of games sent to a worker at once.
+    :param base_seed: Base seed from which the seed of every game is derived.
+    :param first_game: Index of the first game, so that a series played in several calls does not replay the same games.
+    :return: List of the winner of each game in the order of the series, and the list of correct and incorrect predictions made by player 2.
+    """
+    learning = cfg.persist_learning and cpu_name_p2 == "ADAPTIVE" # Only player 2 saves its model at the end of a game
+    merged = learning and workers > 1
+    if merged:
+        if REGISTRY.get(cfg, "ADAPTIVE") is None:
+            REGISTRY.put(cfg, "ADAPTIVE", Computer(cfg, "ADAPTIVE").clf) # New model, the common start of every worker
+            REGISTRY.dump(cfg, "ADAPTIVE")
+        print("Warning: the Adaptive model does not learn between the games of a multi-worker run. Its updates are merged into the model at the end of the run.")
+    REGISTRY.flush() # Every game starts from the model on disk, including in workers loading it themselves.
+    run_cfg = dataclasses.replace(cfg, action_viewer=False, persist_learning=learning and not merged)
+    chunks = [range(first_game + start, first_game + min(start + chunk_size, game_number)) for start in range(0, game_number, chunk_size)]
+    chunk_args = ([run_cfg] * len(chunks), [cpu_name_p1] * len(chunks), [cpu_name_p2] * len(chunks), [base_seed] * len(chunks), chunks)
+    task = learn_chunk if merged else play_chunk
+
+    winners = []
+    prediction = [0, 0]
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor # multiprocessing is only loaded when workers are used
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        chunk_results = pool_map(executor, task, *chunk_args) # Metrics of the workers are merged when the instrumentation is enabled
+    else:
+        executor = None
+        chunk_results = map(task, *chunk_args)
+    try:
+        for results in chunk_results: # Results come back in chunk order
+            if merged:
+                results, coef, intercept, t = results
+                model = REGISTRY.get(cfg, "ADAPTIVE")
+                model.coef_ += coef
+                model.intercept_ += intercept
+                model.t_ += t
+                REGISTRY.put(cfg, "ADAPTIVE", model)
+            for winner, acc_prediction, innac_prediction in results:
+                winners.append(winner)
+                prediction[0] += acc_prediction
+                prediction[1] += innac_prediction
+            print(f"Game Number Progress: {len(winners)} out of {game_number}")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    if merged:
+        REGISTRY.checkpoint(cfg, "ADAPTIVE")
+    return winners, prediction
+
+
+def generate_shard(cfg, names_1, names_2, shard, first_game, game_number, base_seed):
+    """
+    Function that plays the training games of one shard with the batch engine, and writes their rows to the shard's own files.
+    :param cfg: Object of the class Config.
+    :param names_1: Names of the AI models of player 1, alternated game by game.
+    :param names_2: Names of the AI models of player 2, alternated game by game.
+    :param shard: Index of the shard.
+    :param first_game: Index of the first game of the shard in the whole run, which keeps the alternation of the models.
+    :param game_number: Number of games in the shard.
+    :param base_seed: Base seed of the run, or None for a random seed.
+    :return: Tuple of the index of the shard and the number of games played.
+    """
+    for path in (cfg.shard_query(shard), *cfg.binary_data_query(shard)):
+        if os.path.exists(path):
+            os.remove(path) # Leftover of an interrupted run
+    rng_seed = None if base_seed is None else np.random.SeedSequence([base_seed, shard])
+    rng = np.random.default_rng(rng_seed)
+    logger = DataLogger(cfg, shard)
+    for start in range(0, game_number, SHARD_BATCH):
+        batch_size = min(SHARD_BATCH, game_number - start)
+        games = range(first_game + start, first_game + start + batch_size)
+        batch = BatchGame(cfg, [names_1[i % 2] for i in games], [names_2[i % 2] for i in games], batch_size, True, rng)
+        batch.run()
+        logger.record_batch(*batch.training_rows())
+        logger.data_GBC_save()
+    return shard, game_number
+
+
+def merge_shards(cfg, shards):
+    """
+    Function that appends the shard files, in order, to the canonical training data set, and removes them.
+    :param cfg: Object of the class Config.
+    :param shards: Indices of the shards.
+    :return: Nothing.
+    """
+    if cfg.data_format == "BINARY":
+        merge_binary(cfg, shards)
+        return
+    paths = [cfg.shard_query(shard) for shard in shards]
+    data_path = cfg.data_query()
+    header_needed = not os.path.exists(data_path)
+    with open(data_path, "a", newline="") as data_file:
+        for path in paths:
+            with open(path, "r", newline="") as shard_file:
+                header = shard_file.readline()
+                if header_needed:
+                    data_file.write(header)
+                    header_needed = False
+                shutil.copyfileobj(shard_file, data_file)
+            os.remove(path)
+
+
+def generate_training_data(cfg, names_1, names_2, game_number, workers = 1, base_seed = None):
+    """
+    Function that generates the training data set of the GBC model, sharded across worker processes. Every shard is written to its own file, and the shards are merged into the canonical data set at the end.
+    :param cfg: Object of the class Config.
+    :param names_1: Names of the AI models of player 1, alternated game by game.
+    :param names_2: Names of the AI models of player 2, alternated game by game.
+    :param game_number: Number of games to play.
+    :param workers: Number of worker processes, and of shards.
+    :param base_seed: Base seed of the run, or None for a random seed.
+    :return: Nothing.
+    """
+    os.makedirs(cfg.data_dir, exist_ok=True)
+    if game_number <= 0: # No shard would write a file to merge
+        return
+    shards = max(1, min(workers, game_number))
+    bounds = [game_number * shard // shards for shard in range(shards + 1)]
+    shard_args = [(cfg, names_1, names_2, shard, bounds[shard], bounds[shard + 1] - bounds[shard], base_seed) for shard in range(shards)]
+
+    start = time.perf_counter()
+    played = 0
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(generate_shard, *args) for args in shard_args]
+            for future in as_completed(futures):
+                _, shard_games = future.result()
+                played += shard_games
+                print(f"Game Number Progress: {played} out of {game_number} ({played / (time.perf_counter() - start):.0f} games/s)")
+    else:
+        for args in shard_args:
+            _, shard_games = generate_shard(*args)
+            played += shard_games
+            print(f"Game Number Progress: {played} out of {game_number} ({played / (time.perf_counter() - start):.0f} games/s)")
+    merge_shards(cfg, range(shards))
+
+
+def train_chunk(cfg, model, opponents, base_seed, indices):
+    """
+    Function that plays a chunk of training games of the Adaptive model, in a worker process or in the current process. The Adaptive model (player 2) learns game after game on a local copy of the shared model,
+    held by the registry of the worker and never written to disk (cfg.checkpoint_mode is "OFF").
+    :param cfg: Object of the class Config, as sent to the worker.
+    :param model: Shared Adaptive model at the start of the chunk.
+    :param opponents: Names of the AI models of player 1, alternated game by game.
+    :param base_seed: Base seed of the run, or None for unseeded games.
+    :param indices: Indices of the games to play.
+    :return: Tuple of the coefficients, intercepts and number of updates of the local model at the end of the chunk.
+    """
+    REGISTRY.put(cfg, "ADAPTIVE", model)
+    for index in indices:
+        if base_seed is not None:
+            seed = game_seed(base_seed, index)
+            random.seed(seed)
+            np.random.seed(seed)
+        Game(cfg, Computer(cfg, opponents[index % len(opponents)]), Computer(cfg, "ADAPTIVE"))
+    local_model = REGISTRY.get(cfg, "ADAPTIVE")
+    return local_model.coef_, local_model.intercept_, local_model.t_
+
+
+def train_adaptive(cfg, opponents, game_number, workers = 1, sync_games = 50, base_seed = None):
+    """
+    Function that trains the Adaptive model across worker processes. Each worker plays sync_games games on its local copy of the model, then the parameters of the copies are averaged into the shared model,
+    which is sent back to the workers for the next games. The model is written to disk once, at the end of the training.
+    :param cfg: Object of the class Config.
+    :param opponents: Names of the AI models facing the Adaptive model, alternated game by game.
+    :param game_number: Number of games to play.
+    :param workers: Number of worker processes, 1 plays every chunk in the current process.
+    :param sync_games: Number of games played by each worker between two merges of the parameters.
+    :param base_seed: Base seed from which the seed of every game is derived, or None for unseeded games.
+    :return: Nothing.
+    """
+    REGISTRY.flush()
+    model = REGISTRY.get(cfg, "ADAPTIVE")
+    if model is None:
+        model = Computer(cfg, "ADAPTIVE").clf # New model
+    train_cfg = dataclasses.replace(cfg, action_viewer=False, persist_learning=True, checkpoint_mode="OFF")
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = None
+    chunk_map = functools.partial(pool_map, executor) if executor is not None else map
+    played = 0
+    try:
+        while played < game_number:
+            games = min(workers * sync_games, game_number - played)
+            bounds = [played + games * worker // workers for worker in range(workers + 1)]
+            chunks = [range(bounds[i], bounds[i + 1]) for i in range(workers) if bounds[i + 1] > bounds[i]]
+            results = list(chunk_map(train_chunk, [train_cfg] * len(chunks), [model] * len(chunks), [opponents] * len(chunks), [base_seed] * len(chunks), chunks))
+
+            # Averages the local models, weighted by their number of games. The number of updates adds up, so the learning rate decays as if the games had been played in sequence.
+            weights = np.array([len(chunk) for chunk in chunks], dtype=np.float64) / games
+            t_start = model.t_
+            model.coef_ = sum(weight * coef for weight, (coef, _, _) in zip(weights, results)).astype(model.coef_.dtype)
+            model.intercept_ = sum(weight * intercept for weight, (_, intercept, _) in zip(weights, results)).astype(model.intercept_.dtype)
+            model.t_ = t_start + sum(t - t_start for _, _, t in results)
+            played += games
+            print(f"Adaptive Training Progress: {played} out of {game_number}")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    REGISTRY.put(cfg, "ADAPTIVE", model)
+    REGISTRY.dump(cfg, "ADAPTIVE")
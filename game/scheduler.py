@@ -0,0 +1,145 @@
+import dataclasses
+import numpy as np
+
+from computer import Computer
+from game import Game
+from inference import LinearPredictor
+from registry import REGISTRY
+
+ML_MODELS = ("ADAPTIVE", "GBC") # AI models whose moves are predicted in batches
+
+
+class GamePool:
+    """
+    Class GamePool, which advances a pool of games together, one round at a time. The feature rows of every ML player waiting on a move are gathered into one matrix,
+    the model is called once, and the probabilities are dispatched back to each Computer, whose masking and decision() remain the same.
+    A new game enters the pool as soon as one finishes, with the latest model saved by the finished games.
+    The games in flight learn on their own copies of the Adaptive model. When learning is persisted, the update learned by each game (its parameters minus the ones it started from) is added to the shared model as the game finishes,
+    so the learning of every game is kept, rather than the last game to finish overwriting the others.
+    """
+    def __init__(self, cfg, cpu_name_p1, cpu_name_p2, game_number, pool_size):
+        self.cfg = cfg
+        self.merge = cfg.persist_learning and cpu_name_p2 == "ADAPTIVE" # Only player 2 saves its model at the end of a game
+        self.play_cfg = dataclasses.replace(cfg, persist_learning=False) if self.merge else cfg # The pool merges the updates itself
+        self.snapshots = {} # Index of a game -> (Adaptive Computer, coefficients, intercepts and number of updates it started from)
+        self.cpu_names = (cpu_name_p1, cpu_name_p2)
+        self.game_number = game_number
+        self.pool_size = pool_size
+        self.winners = [None] * game_number
+        self.prediction = [0, 0]
+        self.started = 0
+        self.finished = 0
+
+
+    def new_game(self):
+        """
+        Function that starts the next game of the series, without playing it.
+        :return: Tuple of the index of the game and the Game object.
+        """
+        if self.merge and REGISTRY.get(self.cfg, "ADAPTIVE") is None:
+            REGISTRY.put(self.cfg, "ADAPTIVE", Computer(self.play_cfg, "ADAPTIVE").clf) # New model, shared by every game of the pool
+        computer_1 = Computer(self.play_cfg, self.cpu_names[0])
+        computer_2 = Computer(self.play_cfg, self.cpu_names[1])
+        if self.merge:
+            self.snapshots[self.started] = (computer_2, computer_2.clf.coef_.copy(), computer_2.clf.intercept_.copy(), computer_2.clf.t_)
+        game = (self.started, Game(self.play_cfg, computer_1, computer_2, autoplay=False))
+        self.started += 1
+        return game
+
+
+    def end_game(self, index, game):
+        """
+        Function that records the outcome of a finished game, and adds the update learned by its Adaptive model to the shared model when learning is persisted.
+        :param index: Index of the game in the series.
+        :param game: The finished Game object.
+        :return: Nothing.
+        """
+        if self.merge:
+            computer, coef, intercept, t = self.snapshots.pop(index)
+            model = REGISTRY.get(self.cfg, "ADAPTIVE")
+            model.coef_ += computer.clf.coef_ - coef
+            model.intercept_ += computer.clf.intercept_ - intercept
+            model.t_ += computer.clf.t_ - t
+            REGISTRY.put(self.cfg, "ADAPTIVE", model)
+            REGISTRY.checkpoint(self.cfg, "ADAPTIVE")
+        self.winners[index] = game.winner
+        self.prediction[0] += game.acc_prediction
+        self.prediction[1] += game.innac_prediction
+        self.finished += 1
+        if self.finished % 100 == 0:
+            print(f"Game Number Progress: {self.finished} out of {self.game_number}")
+
+
+    def run(self):
+        """
+        Function that plays every game of the series through the pool.
+        :return: List of the winner of each game in the order they were started, and the list of correct and incorrect predictions made by player 2.
+        """
+        pool = [self.new_game() for _ in range(min(self.pool_size, self.game_number))]
+        while pool:
+            # Games reaching the maximum number of turns end without asking the players for an action.
+            running = []
+            for index, game in pool:
+                if game.turn_number > game.turn_max:
+                    game.step()
+                    self.end_game(index, game)
+                    if self.started < self.game_number:
+                        running.append(self.new_game()) # Plays its first round with the others
+                else:
+                    running.append((index, game))
+
+            observations = [game.observe() for _, game in running]
+            probabilities = self.predict(running, observations)
+
+            pool = []
+            for (index, game), observation in zip(running, observations):
+                current_state = observation[0]
+                player_actions = []
+                for player_number, player in enumerate((game.player_1, game.player_2)):
+                    action_state_window = observation[2 - player_number] # Player 1 sees the reversed window
+                    probs = probabilities.get(id(player))
+                    if probs is None:
+                        player_actions.append(player.play(action_state_window, current_state, player_number))
+                    else:
+                        player_actions.append(player.predicted_decision(probs, current_state, player_number, action_state_window))
+                if game.step(observation, player_actions):
+                    self.end_game(index, game)
+                    if self.started < self.game_number:
+                        pool.append(self.new_game())
+                else:
+                    pool.append((index, game))
+        return self.winners, self.prediction
+
+
+    def predict(self, running, observations):
+        """
+        Function that predicts, in one call per model, the opponent's action for every ML player of the pool.
+        GBC Computers share one compiled predictor, while each Adaptive Computer holds its own copy of the model, whose rows are scored together with their respective weights.
+        :param running: List of the index and Game object of the games playing this round.
+        :param observations: Tuple returned by Game.observe() for each of these games.
+        :return: Dictionary mapping the id of each ML player to its probabilities.
+        """
+        gbc_groups = {} # id of the shared predictor -> (predictor, players, rows)
+        adaptive = ([], [], []) # players, predictors, rows
+        for (_, game), observation in zip(running, observations):
+            for player_number, player in enumerate((game.player_1, game.player_2)):
+                if not isinstance(player, Computer) or player.name not in ML_MODELS:
+                    continue
+                row = observation[2 - player_number][0]
+                if player.name == "GBC":
+                    group = gbc_groups.setdefault(id(player.predictor), (player.predictor, [], []))
+                    group[1].append(player)
+                    group[2].append(row)
+                else:
+                    adaptive[0].append(player)
+                    adaptive[1].append(player.predictor)
+                    adaptive[2].append(row)
+
+        probabilities = {}
+        for predictor, players, rows in gbc_groups.values():
+            probs = predictor.predict_proba(np.vstack(rows))
+            probabilities.update((id(player), probs[i]) for i, player in enumerate(players))
+        if adaptive[0]:
+            probs = LinearPredictor.predict_proba_many(adaptive[1], np.vstack(adaptive[2]))
+            probabilities.update((id(player), probs[i]) for i, player in enumerate(adaptive[0]))
+        return probabilities
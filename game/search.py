@@ -0,0 +1,159 @@
+import numpy as np
+import time
+
+from rules import expected_value_table, legal_actions, state_codec, transition_table
+
+
+class SearchBudgetExceeded(Exception):
+    """
+    Exception raised when a search runs out of its node or time budget. Caught by Search.best_action, which then keeps the action of the last depth fully searched.
+    """
+    pass
+
+
+
+class Search:
+    """
+    Class Search, which looks several rounds ahead for an ML model (Adaptive or GBC) with a depth-limited expectimax search.
+    Every round, the opponent's action is weighted by the full distribution predicted by the model from the action_state_window of that round, and the AI model picks the action with the best expected value summed over the rounds.
+    Values of repeated (state, action_state_window, depth) nodes are kept in a transposition table, and a node and time budget bounds the latency of each move.
+    """
+    def __init__(self, cfg, predictor):
+        self.cfg = cfg
+        self.predictor = predictor
+        self.k = cfg.k
+        self.mana_length = cfg.max_mana_points + 1
+        self.transitions = transition_table(cfg.max_health_points, cfg.max_mana_points)
+        self.legal = legal_actions(cfg.max_mana_points)
+        self.codec = state_codec(cfg.max_health_points, cfg.max_mana_points)
+        self.table = {} # Transposition table: (code of the state and depth, action_state_window) -> value
+        self.expected_values = None
+        self.nodes = 0
+        self.deadline = None
+
+
+    def clear(self):
+        """
+        Function that empties the transposition table. Must be called whenever the predictions of the model change, i.e., after every update of the Adaptive model.
+        :return: Nothing.
+        """
+        self.table.clear()
+
+
+    def best_action(self, action_state_window, probs, current_state, player_number):
+        """
+        Function that searches for the best action with iterative deepening, up to cfg.search_depth rounds ahead. The first round is always searched, deeper rounds only within the budget.
+        :param action_state_window: Array containing the action history of the previous k rounds and the state of the players, seen from the opponent, as given to the model.
+        :param probs: Probabilities of each action of the opponent this round, already masked and normalized.
+        :param current_state: Current state of the player's (i.e., hp and mp).
+        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
+        :return: The integer corresponding to the action that the AI model plays, from 1 to 5.
+        """
+        self.expected_values = expected_value_table(self.cfg.max_health_points, self.cfg.max_mana_points, tuple(self.cfg.ev_weights))[0]
+        self.nodes = 0
+        self.deadline = time.perf_counter() + self.cfg.search_time
+        state = tuple(int(x) for x in current_state)
+        window = np.asarray(action_state_window, dtype=np.float32).reshape(-1)
+        best = None
+        for depth in range(1, self.cfg.search_depth + 1):
+            try:
+                action_values = self.action_values(state, window, probs, player_number, depth)
+            except SearchBudgetExceeded:
+                break
+            best = int(np.argmax(action_values)) + 1 # First best action on ties, as Computer.decision
+        return best
+
+
+    def action_values(self, state, window, probs, player_number, depth):
+        """
+        Function that computes the expected value of every action of the AI model in a node of the search.
+        :param state: State of the players at the node, (hp1, hp2, mp1, mp2).
+        :param window: action_state_window of the node, seen from the opponent.
+        :param probs: Probabilities of each action of the opponent at the node.
+        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
+        :param depth: Number of rounds left to search, including this one.
+        :return: Array of the expected value of each action, -inf for the actions that cannot be afforded.
+        """
+        expected_values = self.expected_values[state + (player_number,)] # (opponent action, action)
+        affordable = self.legal[state[2 + player_number]]
+        predicted = np.flatnonzero(probs > 0) # Opponent actions worth following
+        action_values = np.where(affordable, probs @ np.where(np.isfinite(expected_values), expected_values, 0), -np.inf)
+        if depth == 1:
+            return action_values
+
+        # Children of the node, for every affordable action and predicted action of the opponent that do not end the game.
+        children = []
+        for action in np.flatnonzero(affordable):
+            for opp_action in predicted:
+                actions = (action, opp_action) if player_number == 0 else (opp_action, action)
+                next_state = tuple(self.transitions[state][actions].tolist())
+                if next_state[0] > 0 and next_state[1] > 0:
+                    children.append((action, opp_action, next_state, self.next_window(window, next_state, action, opp_action, player_number)))
+        keys = [(self.codec.pack(next_state, depth - 1), next_window.tobytes()) for _, _, next_state, next_window in children] # The depth left takes the place of the turn in the code
+        missing = [i for i, key in enumerate(keys) if key not in self.table]
+        if missing:
+            self.spend(len(missing))
+            child_probs = self.predictor.predict_proba(np.stack([children[i][3] for i in missing]))
+            for i, child_prob in zip(missing, child_probs):
+                _, _, next_state, next_window = children[i]
+                self.table[keys[i]] = float(np.max(self.action_values(next_state, next_window, self.opponent_probs(child_prob, next_state, player_number), player_number, depth - 1)))
+        for (action, opp_action, _, _), key in zip(children, keys):
+            action_values[action] += probs[opp_action] * self.table[key]
+        return action_values
+
+
+    def spend(self, nodes):
+        """
+        Function that accounts for the nodes about to be expanded, and stops the search when the node or time budget is exceeded.
+        :param nodes: Number of nodes about to be expanded.
+        :return: Nothing.
+        :raises: SearchBudgetExceeded when the budget is exceeded.
+        """
+        self.nodes += nodes
+        if self.nodes > self.cfg.search_nodes or time.perf_counter() > self.deadline:
+            raise SearchBudgetExceeded(f"Search stopped after {self.nodes} nodes.")
+
+
+    def opponent_probs(self, probs, state, player_number):
+        """
+        Function that masks the actions the opponent cannot afford and normalizes the probabilities, as Computer.predicted_decision does.
+        :param probs: Probabilities of each action of the opponent predicted by the model.
+        :param state: State of the players, (hp1, hp2, mp1, mp2).
+        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
+        :return: Masked and normalized probabilities, uniform over the affordable actions if the model gives them no weight.
+        """
+        probs = np.where(self.legal[state[3 - player_number]], probs, 0)
+        total = probs.sum()
+        if total > 0:
+            return probs / total
+        return self.legal[state[3 - player_number]] / self.legal[state[3 - player_number]].sum()
+
+
+    def next_window(self, window, next_state, action, opp_action, player_number):
+        """
+        Function that builds the action_state_window of the next round from the current one, as Game.encode_sequence would after the round: the new round is added after the previous rounds (dropping the oldest one once k rounds are held), and the state is replaced.
+        :param window: action_state_window of the current round, seen from the opponent.
+        :param next_state: State of the players after the round, (hp1, hp2, mp1, mp2).
+        :param action: Action of the AI model, from 0 to 4.
+        :param opp_action: Action of the opponent, from 0 to 4.
+        :param player_number: Integer indicating if the player is player 1 (0) or player 2 (1).
+        :return: The action_state_window of the next round.
+        """
+        history = window[:10 * self.k].reshape(self.k, 10)
+        rounds = int(np.count_nonzero(history.any(axis=1)))
+        next_window = np.zeros_like(window)
+        next_history = next_window[:10 * self.k].reshape(self.k, 10)
+        if rounds < self.k:
+            next_history[:rounds] = history[:rounds]
+            slot = rounds
+        else:
+            next_history[:-1] = history[1:]
+            slot = self.k - 1
+        next_history[slot, opp_action] = 1 # The opponent comes first in its own perspective
+        next_history[slot, 5 + action] = 1
+        opp, me = 1 - player_number, player_number
+        next_window[10 * self.k] = next_state[opp]
+        next_window[10 * self.k + 1] = next_state[me]
+        next_window[10 * self.k + 2 + next_state[2 + opp]] = 1
+        next_window[10 * self.k + 2 + self.mana_length + next_state[2 + me]] = 1
+        return next_window
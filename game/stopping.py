@@ -0,0 +1,119 @@
+import math
+
+
+def wilson_interval(successes, trials, z = 1.96):
+    """
+    Function that computes the Wilson score interval of a proportion, which stays within [0, 1] and is reliable for proportions close to 0 or 1.
+    :param successes: Number of successes.
+    :param trials: Number of trials.
+    :param z: Quantile of the normal distribution, 1.96 for a 95% interval.
+    :return: Tuple of the lower and upper bounds of the interval, (0, 1) without any trial.
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+
+class SequentialStop:
+    """
+    Class SequentialStop, which watches the results of a pairing as its games are played, and tells when enough games were played.
+    "CI" stops once the 95% Wilson intervals of the win rate of player 2, and of its prediction accuracy if it predicts, are narrower than a target width.
+    Lopsided pairings reach the width after few games, so most of the games go to the close pairings.
+    "SPRT" runs Wald's sequential probability ratio test on the share of the decisive games won by player 2 (ties are left out, as they favour neither player), testing 0.5 - delta against 0.5 + delta, and stops once either is accepted.
+    """
+    def __init__(self, method, max_games, ci_width = 0.1, sprt_delta = 0.05, alpha = 0.05, beta = 0.05, predicts = True):
+        self.method = method
+        self.max_games = max_games
+        self.ci_width = ci_width
+        self.predicts = predicts
+        self.wins = [0, 0, 0] # Wins of player 1, wins of player 2 and ties
+        self.prediction = [0, 0]
+        self.reason = None
+        p0, p1 = 0.5 - sprt_delta, 0.5 + sprt_delta
+        self.llr = 0.0 # Log-likelihood ratio of the SPRT
+        self.llr_win, self.llr_loss = math.log(p1 / p0), math.log((1 - p1) / (1 - p0))
+        self.upper, self.lower = math.log((1 - beta) / alpha), math.log(beta / (1 - alpha))
+
+
+    @property
+    def games(self):
+        """
+        Function that counts the games accounted for.
+        :return: Number of games played.
+        """
+        return sum(self.wins)
+
+
+    def update(self, winners, prediction):
+        """
+        Function that accounts for a batch of games.
+        :param winners: Winner of each game of the batch, 1 for player 1, 2 for player 2 and 0 for a tie.
+        :param prediction: List of the correct and incorrect predictions made by player 2 during the batch.
+        :return: Nothing.
+        """
+        for winner in winners:
+            match winner:
+                case 1:
+                    self.wins[0] += 1
+                    self.llr += self.llr_loss
+                case 2:
+                    self.wins[1] += 1
+                    self.llr += self.llr_win
+                case _:
+                    self.wins[2] += 1
+        self.prediction[0] += prediction[0]
+        self.prediction[1] += prediction[1]
+
+
+    def done(self):
+        """
+        Function that tells whether the pairing can stop, and records the reason.
+        :return: Boolean, True once the target is reached or every game was played.
+        """
+        match self.method:
+            case "CI":
+                low, high = wilson_interval(self.wins[1], self.games)
+                precise = high - low <= self.ci_width
+                if self.predicts:
+                    low, high = wilson_interval(self.prediction[0], self.prediction[0] + self.prediction[1])
+                    precise = precise and high - low <= self.ci_width
+                if precise:
+                    self.reason = f"95% intervals narrower than {self.ci_width}"
+            case "SPRT":
+                if self.llr >= self.upper:
+                    self.reason = "SPRT: player 2 is stronger"
+                elif self.llr <= self.lower:
+                    self.reason = "SPRT: player 2 is not stronger"
+        if self.reason is None and self.games >= self.max_games:
+            self.reason = "every game played"
+        return self.reason is not None
+
+
+    def summary(self):
+        """
+        Function that summarizes the stop of the pairing.
+        :return: Dictionary of the method, the games played, the games saved and the reason of the stop.
+        """
+        return {"early_stop": self.method, "games_played": self.games, "games_saved": self.max_games - self.games, "stop_reason": self.reason}
+
+
+
+def play_until_stopped(play, stopper, batch_size):
+    """
+    Function that plays a pairing in batches of games until the stopper tells it to stop.
+    :param play: Function playing a batch of games, called with the number of games and the index of the first game, and returning the winners and the list of correct and incorrect predictions made by player 2.
+    :param stopper: Object of the class SequentialStop.
+    :param batch_size: Number of games played between two checks.
+    :return: List of the winner of each game in the order they were played, and the list of correct and incorrect predictions made by player 2.
+    """
+    winners = []
+    while not stopper.done():
+        batch_winners, batch_prediction = play(min(batch_size, stopper.max_games - stopper.games), stopper.games)
+        stopper.update(batch_winners, batch_prediction)
+        winners.extend(batch_winners)
+    return winners, list(stopper.prediction)
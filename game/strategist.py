@@ -0,0 +1,104 @@
+import numpy as np
+from scipy.optimize import linprog
+
+from rules import legal_actions, transition_table
+
+
+class SolverError(Exception):
+    """
+    Exception raised when the linear program of a matrix game cannot be solved, rather than saving a policy made of an invalid solution.
+    """
+    def __init__(self, message, state = None):
+        super().__init__(message)
+        self.state = state # Index of the state among the states solved together, once known
+
+
+
+def matrix_game(payoff):
+    """
+    Function that solves a zero-sum matrix game with linear programming, the row player maximizing and the column player minimizing the payoff.
+    :param payoff: Matrix of the payoffs of the row player, of shape (rows, columns).
+    :return: Tuple of the value of the game, the mixed strategy of the row player and the mixed strategy of the column player.
+    :raises: SolverError if the linear program is not solved.
+    """
+    rows, columns = payoff.shape
+    # Variables are the probabilities of the rows followed by the value v, maximized under payoff.T @ x >= v. The duals of these constraints are the strategy of the column player.
+    result = linprog(np.r_[np.zeros(rows), -1], A_ub=np.c_[-payoff.T, np.ones(columns)], b_ub=np.zeros(columns),
+                     A_eq=np.r_[np.ones(rows), 0][None, :], b_eq=[1], bounds=[(0, None)] * rows + [(None, None)], method="highs")
+    if not result.success:
+        raise SolverError(f"linprog failed with status {result.status}: {result.message}")
+    row = np.clip(result.x[:rows], 0, None)
+    column = np.clip(-result.ineqlin.marginals, 0, None)
+    return -result.fun, row / row.sum(), column / column.sum()
+
+
+def solve_states(payoff, valid, solved):
+    """
+    Function that solves the matrix games of many states at once. Games with a saddle point are solved with array operations, and the remaining games with matrix_game, each distinct game being solved only once.
+    :param payoff: Payoffs of player 1 for every state and pair of actions, of shape (states, 5, 5).
+    :param valid: Boolean array of the same shape, True where both actions can be afforded.
+    :param solved: Dictionary of the distinct games already solved, shared across rounds.
+    :return: Tuple of the value of every state, and of the mixed strategies of player 1 and player 2, each of shape (states, 5).
+    """
+    n_states = payoff.shape[0]
+    lower_rows = np.where(valid, payoff, np.inf).min(axis=2) # Worst payoff of each action of player 1
+    lower_rows[~valid.any(axis=2)] = -np.inf
+    upper_columns = np.where(valid, payoff, -np.inf).max(axis=1) # Worst payoff of each action of player 2
+    upper_columns[~valid.any(axis=1)] = np.inf
+    lower, upper = lower_rows.max(axis=1), upper_columns.min(axis=1)
+
+    values = lower.copy()
+    strategies = np.zeros((n_states, 2, 5))
+    saddle = np.isclose(lower, upper)
+    states = np.arange(n_states)
+    strategies[states[saddle], 0, lower_rows[saddle].argmax(axis=1)] = 1
+    strategies[states[saddle], 1, upper_columns[saddle].argmin(axis=1)] = 1
+
+    for state in states[~saddle]:
+        rows, columns = valid[state].any(axis=1), valid[state].any(axis=0)
+        game = payoff[state][np.ix_(rows, columns)]
+        key = (rows.tobytes(), columns.tobytes(), np.round(game, 9).tobytes())
+        if key not in solved:
+            try:
+                solved[key] = matrix_game(game)
+            except SolverError as e:
+                raise SolverError(str(e), int(state)) from e
+        values[state], strategies[state, 0, rows], strategies[state, 1, columns] = solved[key]
+    return values, strategies
+
+
+def solve(max_health_points, max_mana_points, max_num_turns):
+    """
+    Function that solves DRACS exactly by backward induction over the rounds remaining, from the end of the game (scored as Game.turned_out) back to its first round.
+    Every state is a simultaneous zero-sum game between the players, worth 1 if player 1 wins, -1 if player 2 wins and 0 for a tie.
+    :param max_health_points: Maximum health points of a player.
+    :param max_mana_points: Maximum mana points of a player.
+    :param max_num_turns: Maximum number of turns of a game.
+    :return: Bundle holding the number of turns, the value of every state for player 1, of shape (rounds remaining, hp1, hp2, mp1, mp2),
+             and the policy, of shape (rounds remaining, hp1, hp2, mp1, mp2, player number, action), giving the probability of each action.
+    :raises: SolverError naming the state and the rounds remaining if the matrix game of a state is not solved.
+    """
+    H, M = max_health_points + 1, max_mana_points + 1
+    legal = legal_actions(max_mana_points)
+    hp1, hp2, mp1, mp2 = np.indices((H, H, M, M))
+    alive = (hp1 > 0) & (hp2 > 0)
+    valid = (legal[mp1][..., :, None] & legal[mp2][..., None, :])[alive]
+
+    next_state = np.clip(transition_table(max_health_points, max_mana_points)[alive].astype(np.intp), 0, None) # Unaffordable pairs are masked by valid
+    next_hp1, next_hp2, next_mp1, next_mp2 = np.moveaxis(next_state, -1, 0)
+    over = (next_hp1 == 0) | (next_hp2 == 0)
+    end = np.where(next_hp1 == next_hp2, 0, np.where(next_hp1 == 0, -1, 1)) # Game.check_win, only used where over
+
+    scores = (hp1 + 0.75 * mp1) - (hp2 + 0.75 * mp2)
+    value = np.zeros((max_num_turns + 1, H, H, M, M))
+    value[0] = np.sign(scores) # Game.turned_out, once every round has been played
+    policy = np.zeros((max_num_turns + 1, H, H, M, M, 2, 5), dtype=np.float32)
+    solved = {} # Distinct games, many states and rounds sharing the same payoffs
+    for rounds in range(1, max_num_turns + 1):
+        payoff = np.where(over, end, value[rounds - 1][next_hp1, next_hp2, next_mp1, next_mp2])
+        try:
+            value[rounds][alive], policy[rounds][alive] = solve_states(payoff, valid, solved)
+        except SolverError as e:
+            state = tuple(int(x) for x in np.argwhere(alive)[e.state])
+            raise SolverError(f"Strategist policy not solved for the state (hp1, hp2, mp1, mp2) = {state} with {rounds} rounds remaining: {e}", e.state) from e
+    return {"turns": max_num_turns, "value": value, "policy": policy}
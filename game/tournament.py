@@ -0,0 +1,206 @@
+import dataclasses
+import json
+import os
+import zlib
+
+from computer import Computer
+from instrument import pool_map
+from registry import REGISTRY
+from runner import game_seed, play_chunk
+from scheduler import ML_MODELS
+from stopping import wilson_interval
+
+MODELS = ["RANDOM", "SIMPLE", "ADAPTIVE", "STRATEGIST", "GBC"] # Core names of the AI models
+MODEL_FILES = ("ADAPTIVE", "STRATEGIST", "GBC") # AI models stored on disk, whose pairings are replayed when the model file changes
+INITIAL_RATING = 1500.0
+
+
+def update_elo(ratings, cpu_name_p1, cpu_name_p2, winners, k_factor):
+    """
+    Function that updates the Elo ratings of two AI models game by game, in the order the games were played. A tie scores half a win.
+    :param ratings: Dictionary of the rating of every AI model, updated in place. Unrated models start at INITIAL_RATING.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2.
+    :param winners: Winner of each game, 1 for player 1, 2 for player 2 and 0 for a tie.
+    :param k_factor: Largest change of rating of a single game.
+    :return: Nothing.
+    """
+    rating_1 = ratings.get(cpu_name_p1, INITIAL_RATING)
+    rating_2 = ratings.get(cpu_name_p2, INITIAL_RATING)
+    for winner in winners:
+        expected = 1 / (1 + 10 ** ((rating_2 - rating_1) / 400))
+        score = 1.0 if winner == 1 else 0.0 if winner == 2 else 0.5
+        rating_1 += k_factor * (score - expected)
+        rating_2 -= k_factor * (score - expected)
+    ratings[cpu_name_p1] = rating_1
+    ratings[cpu_name_p2] = rating_2
+
+
+def pairing_seed(base_seed, cpu_name_p1, cpu_name_p2):
+    """
+    Function that derives the base seed of one pairing from the base seed of the tournament, so a pairing plays the same games whichever other pairings are scheduled with it.
+    :param base_seed: Base seed of the tournament.
+    :param cpu_name_p1: Core name of the AI model of player 1.
+    :param cpu_name_p2: Core name of the AI model of player 2.
+    :return: Integer base seed of the pairing.
+    """
+    return game_seed(base_seed, zlib.crc32(f"{cpu_name_p1} vs {cpu_name_p2}".encode()))
+
+
+def model_stamps(cfg):
+    """
+    Function that identifies the current version of the AI models stored on disk.
+    :param cfg: Object of the class Config.
+    :return: Dictionary of the stamp of every model file, None for a model that does not exist.
+    """
+    stamps = {}
+    for model_name in MODEL_FILES:
+        stamp = REGISTRY.file_stamp(cfg.model_query(model_name))
+        stamps[model_name] = list(stamp) if stamp is not None else None # As stored in JSON
+    return stamps
+
+
+
+class Tournament:
+    """
+    Class Tournament, which plays every ordered pair of AI models (each model playing both sides against every other model), and rates the models with Elo ratings.
+    Results are cached on disk per pairing, so adding a model only plays its own pairings, and a pairing is only replayed when the file of one of its models changes.
+    The Elo ratings are updated incrementally with the games of the new pairings, and recomputed from the cached games when a pairing is replayed.
+    """
+    def __init__(self, cfg, models = None, game_number = 100, base_seed = 0, k_factor = 16.0, path = None):
+        self.cfg = cfg
+        self.models = list(models) if models is not None else list(MODELS)
+        self.game_number = game_number
+        self.base_seed = base_seed
+        self.k_factor = k_factor
+        self.path = path if path is not None else cfg.tournament_query()
+        self.state = self.load()
+
+
+    def load(self):
+        """
+        Function that loads the cached tournament, or starts a new one if it does not exist or was played with other settings.
+        :return: Dictionary of the settings, the ratings, the order in which the pairings were rated, and the results of every pairing.
+        """
+        settings = {"game_number": self.game_number, "base_seed": self.base_seed, "k_factor": self.k_factor}
+        try:
+            with open(self.path) as file:
+                state = json.load(file)
+            if state["settings"] == settings:
+                return state
+        except (OSError, ValueError, KeyError):
+            pass
+        return {"settings": settings, "ratings": {}, "order": [], "pairings": {}}
+
+
+    def save(self):
+        """
+        Function that writes the tournament to its cache file, atomically.
+        :return: Nothing.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.state, file)
+        os.replace(tmp_path, self.path)
+
+
+    def pending(self):
+        """
+        Function that lists the pairings to play, i.e., the ordered pairs of models not cached yet, or whose models changed since they were played.
+        Stale pairings are dropped, and the ratings are recomputed from the pairings that remain.
+        :return: List of the (player 1, player 2) pairings to play.
+        """
+        stamps = model_stamps(self.cfg)
+        stale = [key for key, result in self.state["pairings"].items() if any(result["stamps"].get(name) != stamps[name] for name in (result["p1"], result["p2"]) if name in MODEL_FILES)]
+        if stale:
+            for key in stale:
+                del self.state["pairings"][key]
+            self.state["order"] = [key for key in self.state["order"] if key not in stale]
+            self.state["ratings"] = {}
+            for key in self.state["order"]:
+                result = self.state["pairings"][key]
+                update_elo(self.state["ratings"], result["p1"], result["p2"], [int(winner) for winner in result["winners"]], self.k_factor)
+        return [(p1, p2) for p1 in self.models for p2 in self.models if p1 != p2 and f"{p1} vs {p2}" not in self.state["pairings"]]
+
+
+    def run(self, workers = 1, chunk_size = 100):
+        """
+        Function that plays the pending pairings, their chunks of games being spread across a single pool of worker processes. Each pairing is rated and cached as soon as all its games are played.
+        :param workers: Number of worker processes, 1 plays every chunk in the current process.
+        :param chunk_size: Number of games sent to a worker at once.
+        :return: The results of the tournament, as given by results().
+        """
+        pairings = self.pending()
+        REGISTRY.flush() # Every game starts from the model on disk, including in workers loading it themselves.
+        run_cfg = dataclasses.replace(self.cfg, action_viewer=False, persist_learning=False)
+        for cpu_name in sorted({name for pairing in pairings for name in pairing} & set(MODEL_FILES)):
+            Computer(run_cfg, cpu_name) # Solves or trains a missing model once here, rather than in every worker
+        chunks = [(p1, p2, range(start, min(start + chunk_size, self.game_number))) for p1, p2 in pairings for start in range(0, self.game_number, chunk_size)]
+        chunk_args = ([run_cfg] * len(chunks), [p1 for p1, _, _ in chunks], [p2 for _, p2, _ in chunks], [pairing_seed(self.base_seed, p1, p2) for p1, p2, _ in chunks], [indices for _, _, indices in chunks])
+
+        if workers > 1 and chunks:
+            from concurrent.futures import ProcessPoolExecutor
+
+            executor = ProcessPoolExecutor(max_workers=workers)
+            chunk_results = pool_map(executor, play_chunk, *chunk_args)
+        else:
+            executor = None
+            chunk_results = map(play_chunk, *chunk_args)
+        try:
+            games = []
+            for (p1, p2, indices), results in zip(chunks, chunk_results): # Results come back in chunk order, so the chunks of a pairing arrive together
+                games.extend(results)
+                if indices.stop < self.game_number:
+                    continue
+                self.record(p1, p2, games)
+                games = []
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        return self.results()
+
+
+    def record(self, cpu_name_p1, cpu_name_p2, games):
+        """
+        Function that rates and caches the games of a pairing.
+        :param cpu_name_p1: Core name of the AI model of player 1.
+        :param cpu_name_p2: Core name of the AI model of player 2.
+        :param games: List of the winner, correct predictions and incorrect predictions of each game, in the order they were played.
+        :return: Nothing.
+        """
+        key = f"{cpu_name_p1} vs {cpu_name_p2}"
+        winners = [winner for winner, _, _ in games]
+        update_elo(self.state["ratings"], cpu_name_p1, cpu_name_p2, winners, self.k_factor)
+        self.state["order"].append(key)
+        self.state["pairings"][key] = {"p1": cpu_name_p1, "p2": cpu_name_p2, "winners": "".join(str(winner) for winner in winners),
+                                       "correct_predictions_p2": sum(acc for _, acc, _ in games), "incorrect_predictions_p2": sum(innac for _, _, innac in games),
+                                       "stamps": model_stamps(self.cfg)}
+        self.save()
+        print(f"Pairing Progress: {key} played, {len(self.state['order'])} pairings rated")
+
+
+    def results(self):
+        """
+        Function that summarizes the tournament for the selected models.
+        :return: Dictionary of the Elo ratings, of the win and tie matrices with their 95% Wilson intervals, indexed [player 1][player 2], and of the prediction accuracy of the ML models playing player 2.
+        """
+        wins, ties, intervals, tie_intervals, accuracy = {}, {}, {}, {}, {}
+        for p1 in self.models:
+            wins[p1], ties[p1], intervals[p1], tie_intervals[p1] = {}, {}, {}, {}
+            for p2 in self.models:
+                result = self.state["pairings"].get(f"{p1} vs {p2}")
+                if result is None:
+                    continue
+                games = len(result["winners"])
+                wins[p1][p2] = result["winners"].count("1") / games
+                ties[p1][p2] = result["winners"].count("0") / games
+                intervals[p1][p2] = wilson_interval(result["winners"].count("1"), games)
+                tie_intervals[p1][p2] = wilson_interval(result["winners"].count("0"), games)
+                predictions = result["correct_predictions_p2"] + result["incorrect_predictions_p2"]
+                if p2 in ML_MODELS and predictions: # Only the ML models predict the actions of their opponent
+                    accuracy[f"{p1} vs {p2}"] = result["correct_predictions_p2"] / predictions
+        ratings = {name: self.state["ratings"].get(name, INITIAL_RATING) for name in self.models}
+        return {"ratings": dict(sorted(ratings.items(), key=lambda item: -item[1])), "games_per_pairing": self.game_number,
+                "win_rate_p1": wins, "tie_rate": ties, "win_rate_p1_interval": intervals, "tie_rate_interval": tie_intervals,
+                "prediction_accuracy_p2": accuracy}
@@ -0,0 +1,117 @@
+import hashlib
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from dataset import compact, load_training_data
+from registry import REGISTRY
+
+HOLDOUT = 0.2 # Share of the rows held out to measure the accuracy of the GBC model
+
+
+def holdout_mask(start, stop):
+    """
+    Function that tells which rows of the data set are held out. The choice only depends on the index of the row, so a row keeps its side of the split from one retraining to the next.
+    :param start: Index of the first row.
+    :param stop: Index after the last row.
+    :return: Boolean array, True for the held-out rows.
+    """
+    index = np.arange(start, stop, dtype=np.uint64)
+    return (index * np.uint64(2654435761)) % np.uint64(2**32) < np.uint64(HOLDOUT * 2**32) # Multiplicative hash, spreading the held-out rows evenly
+
+
+def data_hash(features, labels, rows, chunk_size = 1000000):
+    """
+    Function that hashes the first rows of the data set, to check that the rows a model was fitted on were not changed since.
+    :param features: Feature matrix of the data set.
+    :param labels: Label vector of the data set.
+    :param rows: Number of rows to hash.
+    :param chunk_size: Number of rows hashed at once.
+    :return: Hexadecimal digest of the rows.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for start in range(0, rows, chunk_size):
+        stop = min(start + chunk_size, rows)
+        digest.update(np.ascontiguousarray(features[start:stop], dtype=np.uint8).tobytes())
+        digest.update(np.ascontiguousarray(labels[start:stop], dtype=np.int8).tobytes())
+    return digest.hexdigest()
+
+
+def anchor_rows(cfg, n_features):
+    """
+    Function that builds rows of zero weight holding every possible value of every feature and every label. Added to every chunk, they give the same bins and classes to every warm-started fit.
+    :param cfg: Object of the class Config.
+    :param n_features: Number of features.
+    :return: Tuple of the feature matrix, the label vector and the zero weights of the anchor rows.
+    """
+    n_rows = max(cfg.max_health_points + 1, 5)
+    features = np.tile((np.arange(n_rows) % 2)[:, None], (1, n_features)).astype(np.uint8) # One-hot features take 0 and 1
+    features[:, 10 * cfg.k:10 * cfg.k + 2] = np.minimum(np.arange(n_rows), cfg.max_health_points)[:, None] # hp takes 0 to max_health_points
+    labels = np.arange(n_rows) % 5 + 1
+    return features, labels, np.zeros(n_rows)
+
+
+def held_out_counts(model, features, labels, chunk_size, first_row = 0):
+    """
+    Function that scores the model on the held-out rows of the data set from first_row on, streamed in chunks.
+    :param model: Fitted model.
+    :param features: Feature matrix of the data set.
+    :param labels: Label vector of the data set.
+    :param chunk_size: Number of rows read at once.
+    :param first_row: Index of the first row scored, e.g., the first row added since the last training.
+    :return: Tuple of the number of held-out rows whose label is predicted, and of the number of held-out rows.
+    """
+    correct = 0
+    total = 0
+    for start in range(first_row, labels.shape[0], chunk_size):
+        stop = min(start + chunk_size, labels.shape[0])
+        mask = holdout_mask(start, stop)
+        if not mask.any():
+            continue
+        X, y, counts = compact(features[start:stop][mask], labels[start:stop][mask]) # Each distinct row is predicted once
+        correct += int(counts[model.predict(X) == y].sum())
+        total += int(counts.sum())
+    return correct, total
+
+
+def train_gbc(cfg):
+    """
+    Function that fits the GBC model on the rows of the data set it has not seen yet, streamed in chunks of cfg.gbc_chunk_size rows. Each chunk warm-starts a histogram-based booster with cfg.gbc_chunk_iterations more iterations,
+    so the cost of a retraining follows the new rows rather than the whole data set. The model is fitted from scratch if it does not exist, is not incremental, or if the rows it was fitted on changed.
+    The held-out counts are kept in the bundle and only the held-out rows of the new rows are scored, so the accuracy is a running one: each held-out row is scored by the model fitted up to its own rows.
+    :param cfg: Object of the class Config.
+    :return: The bundle of the model, holding the model, the names of the features, the number of rows fitted, their hash, the held-out counts and the held-out accuracy.
+    """
+    features, labels, feature_cols = load_training_data(cfg)
+    n_rows = labels.shape[0]
+    bundle = REGISTRY.get(cfg, "GBC")
+    if bundle is not None and bundle.get("rows", n_rows + 1) <= n_rows and bundle.get("hash") == data_hash(features, labels, bundle["rows"]):
+        model, start = bundle["model"], bundle["rows"]
+        holdout = bundle.get("holdout")
+        if start == n_rows:
+            print("GBC model is up-to-date with the data set.")
+            return bundle
+        print(f"Updating GBC model with {n_rows - start} new rows. Please wait...")
+    else:
+        model, start = HistGradientBoostingClassifier(max_iter=cfg.gbc_chunk_iterations, early_stopping=False, warm_start=True, random_state=42), 0
+        holdout = (0, 0)
+        print("Creating Model. Please wait...")
+
+    anchor_features, anchor_labels, anchor_weights = anchor_rows(cfg, len(feature_cols))
+    for chunk_start in range(start, n_rows, cfg.gbc_chunk_size):
+        chunk_stop = min(chunk_start + cfg.gbc_chunk_size, n_rows)
+        mask = ~holdout_mask(chunk_start, chunk_stop)
+        X, y, counts = compact(features[chunk_start:chunk_stop][mask], labels[chunk_start:chunk_stop][mask])
+        if hasattr(model, "_predictors"): # Already fitted, the new iterations are fitted on this chunk
+            model.max_iter = model.n_iter_ + cfg.gbc_chunk_iterations
+        model.fit(np.concatenate([anchor_features, X]), np.concatenate([anchor_labels, y]), sample_weight=np.concatenate([anchor_weights, counts]))
+
+    if holdout is None: # Bundle of an earlier version, without held-out counts
+        holdout, start = (0, 0), 0
+    correct, total = held_out_counts(model, features, labels, cfg.gbc_chunk_size, start)
+    holdout = (holdout[0] + correct, holdout[1] + total)
+    bundle = {"model": model, "feature_cols": feature_cols, "rows": n_rows, "hash": data_hash(features, labels, n_rows),
+              "holdout": holdout, "accuracy": holdout[0] / holdout[1] if holdout[1] else None}
+    print(f"GBC held-out accuracy: {bundle['accuracy']}")
+    REGISTRY.put(cfg, "GBC", bundle)
+    REGISTRY.dump(cfg, "GBC")
+    return bundle
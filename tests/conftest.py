@@ -0,0 +1,6 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT) # The benchmarks package
+sys.path.insert(0, os.path.join(ROOT, "game")) # The game is made of flat modules, imported as main.py imports them
@@ -0,0 +1,17 @@
+from benchmarks.importtime import import_times
+from benchmarks.suite import compare
+
+
+def test_compare_flags_metrics_missing_from_the_current_run():
+    baseline = {"results": {"default": {"games_per_s_RANDOM_SIMPLE_batch": 100.0, "move_GBC_p50_us": 10.0}, "startup": {"import_ms": 150.0}}}
+    current = {"results": {"default": {"games_per_s_RANDOM_SIMPLE_batch": 95.0}}}
+    rows = {(size, metric): row for size, metric, *row in compare(baseline, current)}
+    assert rows[("default", "games_per_s_RANDOM_SIMPLE_batch")][-1] is False
+    assert rows[("default", "move_GBC_p50_us")] == [10.0, None, None, True]
+    assert rows[("startup", "import_ms")][-1] is True
+
+
+def test_import_time_of_the_game_leaves_out_numpy_and_the_interpreter_startup():
+    total, numpy_time, game_time, _ = import_times("import numpy\nimport rules")
+    assert numpy_time > 0
+    assert 0 < game_time < total - numpy_time
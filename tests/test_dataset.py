@@ -0,0 +1,24 @@
+import dataclasses
+
+from config import Config
+from dataset import load_training_data
+from runner import generate_training_data
+
+
+def test_csv_rows_kept_when_binary_rows_are_appended(tmp_path):
+    """
+    An existing CSV data set is converted before the first binary rows are appended, so its rows stay in the training data.
+    """
+    csv_cfg = Config(action_viewer=False, models_dir=tmp_path / "models", data_dir=tmp_path / "data", data_format="CSV")
+    generate_training_data(csv_cfg, ["RANDOM", "SIMPLE"], ["SIMPLE_2", "RANDOM_2"], 50, 1, 0)
+    csv_rows = load_training_data(csv_cfg)[1].shape[0]
+
+    binary_cfg = dataclasses.replace(csv_cfg, data_format="BINARY")
+    generate_training_data(binary_cfg, ["RANDOM", "SIMPLE"], ["SIMPLE_2", "RANDOM_2"], 50, 1, 1)
+    features, labels, _ = load_training_data(binary_cfg)
+    assert csv_rows > 0
+    assert labels.shape[0] > csv_rows
+    assert features.shape[0] == labels.shape[0]
+
+    generate_training_data(binary_cfg, ["RANDOM", "SIMPLE"], ["SIMPLE_2", "RANDOM_2"], 50, 1, 1) # The same games again, without converting the CSV twice
+    assert load_training_data(binary_cfg)[1].shape[0] == 2 * labels.shape[0] - csv_rows
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import SGDClassifier
+
+from inference import LinearPredictor, TreeEnsemblePredictor
+
+
+def _windows(rows, seed):
+    """
+    Function that draws action_state_windows shaped like the ones of a game: past actions from 1 to 5, then the health and mana points of the players.
+    """
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(1, 6, size=(rows, 6))
+    states = rng.integers(0, 6, size=(rows, 4))
+    return np.hstack([actions, states]).astype(np.float64), rng.integers(1, 6, size=rows)
+
+
+def test_linear_predictor_matches_sklearn():
+    """
+    The compiled Adaptive model gives the probabilities of SGDClassifier, after a fit and after each partial_fit, for one row, a batch and a pool of models.
+    """
+    X, y = _windows(300, 0)
+    clf = SGDClassifier(loss="log_loss", random_state=42).fit(X, y)
+    predictor = LinearPredictor(clf)
+    assert np.allclose(predictor.predict_proba(X), clf.predict_proba(X))
+    assert np.allclose(predictor.predict_proba(X[0]), clf.predict_proba(X[:1]))
+    X_new, y_new = _windows(50, 1)
+    clf.partial_fit(X_new, y_new)
+    predictor.refresh()
+    assert np.allclose(predictor.predict_proba(X_new), clf.predict_proba(X_new))
+    other = SGDClassifier(loss="log_loss", random_state=0).fit(X_new, y_new)
+    predictors = [predictor, LinearPredictor(other)] * 5
+    many = LinearPredictor.predict_proba_many(predictors, X[:10])
+    assert np.allclose(many, np.vstack([model.predict_proba(X[i:i + 1]) for i, model in enumerate([clf, other] * 5)]))
+
+
+@pytest.mark.parametrize("model, frame", [
+    (GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=42), True), # The shipped GBC model was fitted on a DataFrame
+    (HistGradientBoostingClassifier(max_iter=20, early_stopping=False, random_state=42), False), # The trainer fits arrays
+], ids=["gbc", "hist_gbc"])
+def test_tree_ensemble_predictor_matches_sklearn(model, frame):
+    """
+    The compiled GBC model gives the probabilities of the fitted GradientBoostingClassifier or HistGradientBoostingClassifier, for one row and a batch.
+    """
+    X, y = _windows(400, 2)
+    X_test, _ = _windows(100, 3)
+    if frame:
+        columns = [f"f{i}" for i in range(X.shape[1])]
+        X, X_test = pd.DataFrame(X, columns=columns), pd.DataFrame(X_test, columns=columns)
+    model.fit(X, y)
+    predictor = TreeEnsemblePredictor(model)
+    expected = model.predict_proba(X_test)
+    X_test = np.asarray(X_test)
+    assert np.allclose(predictor.predict_proba(X_test), expected)
+    assert np.allclose(predictor.predict_proba(X_test[0]), expected[:1])
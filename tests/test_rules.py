@@ -0,0 +1,150 @@
+import itertools
+
+import numpy as np
+
+from config import Config
+from rules import ACTION_COSTS, expected_value_table, legal_actions, resolve_round, state_codec, transition_table
+from strategist import solve
+
+
+class _Player:
+    """
+    Class _Player, which mirrors the health and mana bookkeeping of the original Player class.
+    """
+
+    def __init__(self, health_points, mana_points, max_health_points, max_mana_points):
+        self.health_points, self.mana_points = health_points, mana_points
+        self.max_health_points, self.max_mana_points = max_health_points, max_mana_points
+
+    def set_health_points(self, health_points):
+        self.health_points = min(self.health_points + health_points, self.max_health_points)
+
+    def set_mana_points(self, mana_points, action):
+        self.mana_points = min(self.mana_points + mana_points, self.max_mana_points)
+        if self.mana_points < 0:
+            self.mana_points = 0
+            if action == 5:
+                self.set_health_points(mana_points)
+
+
+def _reference_round(state, actions, max_health_points, max_mana_points):
+    """
+    Function that plays one round the way the original Game.round_development did, on two player objects.
+    """
+    players = [_Player(state[i], state[i + 2], max_health_points, max_mana_points) for i in range(2)]
+    for player, action in zip(players, actions):
+        player.mana_points -= ACTION_COSTS[action - 1]
+    stats_box = [0, 0, 0, 0]
+    for player_turn, action in enumerate(actions):
+        opp = (player_turn + 1) % 2
+        if action == 1:
+            stats_box[opp] -= 1
+        elif action == 2 and actions[opp] == 1:
+            players[opp].set_mana_points(-1, 2)
+            stats_box[player_turn] += 1
+        elif action == 3:
+            stats_box[player_turn + 2] += 2
+        elif action == 4 and actions[opp] == 1:
+            stats_box[player_turn] += 1
+            stats_box[opp] -= 1
+        elif action == 5:
+            if actions[opp] in (1, 3, 4):
+                stats_box[player_turn] += 1
+                stats_box[opp] -= 1
+            if actions[opp] == 2:
+                stats_box[opp + 2] -= 1
+                if players[opp].mana_points > 0:
+                    stats_box[player_turn + 2] += 1
+            elif actions[opp] == 3 or (actions[opp] == 4 and players[opp].mana_points > 0):
+                stats_box[player_turn + 2] += 1
+                stats_box[opp + 2] -= 1
+    for i in range(2):
+        players[i].set_health_points(stats_box[i])
+    for i in range(2):
+        players[i].set_mana_points(stats_box[i + 2], 5)
+    return players[0].health_points, players[1].health_points, players[0].mana_points, players[1].mana_points
+
+
+def _states(max_health_points, max_mana_points):
+    """
+    Function that yields every state (hp1, hp2, mp1, mp2) of the given configuration.
+    """
+    health, mana = range(max_health_points + 1), range(max_mana_points + 1)
+    return itertools.product(health, health, mana, mana)
+
+
+def _affordable(mana_points):
+    """
+    Function that lists the actions, from 1 to 5, that can be paid with the given mana points.
+    """
+    return [action for action in range(1, 6) if ACTION_COSTS[action - 1] <= mana_points]
+
+
+def test_transition_table_matches_the_reference_round():
+    """
+    Every legal pair of actions in every state resolves as the original round did, and illegal pairs are marked with -1.
+    """
+    cfg = Config()
+    H, M = cfg.max_health_points, cfg.max_mana_points
+    table = transition_table(H, M)
+    legal = legal_actions(M)
+    checked = 0
+    for state in _states(H, M):
+        for a1, a2 in itertools.product(range(1, 6), repeat=2):
+            if a1 in _affordable(state[2]) and a2 in _affordable(state[3]):
+                expected = _reference_round(state, (a1, a2), H, M)
+                assert resolve_round(state, (a1, a2), H, M) == expected, (state, a1, a2)
+                assert tuple(table[state + (a1 - 1, a2 - 1)]) == expected, (state, a1, a2)
+                checked += 1
+            else:
+                assert (table[state + (a1 - 1, a2 - 1)] == -1).all(), (state, a1, a2)
+            assert legal[state[2], a1 - 1] == (a1 in _affordable(state[2]))
+    assert checked > 0
+
+
+def test_expected_value_table_matches_a_direct_computation():
+    """
+    The expected value of every affordable action, for both players and every affordable prediction, is the documented formula applied to the reference round.
+    """
+    cfg = Config()
+    H, M = cfg.max_health_points, cfg.max_mana_points
+    w_hp, w_mp, w_term = cfg.ev_weights
+    expected_values, best_actions = expected_value_table(H, M, cfg.ev_weights)
+    for state in _states(H, M):
+        for player_number in range(2):
+            opp = 1 - player_number
+            for predicted in range(1, 6):
+                values = np.full(5, -np.inf)
+                if predicted in _affordable(state[2 + opp]):
+                    for action in _affordable(state[2 + player_number]):
+                        actions = (action, predicted) if player_number == 0 else (predicted, action)
+                        outcome = _reference_round(state, actions, H, M)
+                        lost_health = [state[i] - outcome[i] for i in range(2)]
+                        lost_mana = [state[i + 2] - outcome[i + 2] for i in range(2)]
+                        if outcome[0] == 0 and outcome[1] == 0:
+                            end = -1
+                        elif outcome[opp] == 0:
+                            end = 1
+                        elif outcome[player_number] == 0:
+                            end = -1
+                        else:
+                            end = 0
+                        values[action - 1] = w_hp * (lost_health[opp] - lost_health[player_number]) + w_mp * (lost_mana[opp] - lost_mana[player_number]) + w_term * end
+                index = state + (player_number, predicted - 1)
+                assert np.allclose(expected_values[index], values), (index, expected_values[index], values)
+                assert best_actions[index] == int(np.argmax(values)) + 1
+
+
+def test_state_codes_index_the_strategist_policy():
+    """
+    The code of a state and its rounds remaining is its row in the flattened policy, and distinct states get distinct codes.
+    """
+    policy = solve(3, 2, 4)["policy"]
+    codec = state_codec(3, 2)
+    rows = codec.flat(policy, turns=True)
+    codes = set()
+    for index in np.ndindex(policy.shape[:5]):
+        code = codec.pack(index[1:], index[0])
+        codes.add(code)
+        assert np.array_equal(rows[code], policy[index])
+    assert codes == set(range(rows.shape[0]))
@@ -0,0 +1,34 @@
+import os
+
+from config import Config
+from dataset import binary_existence
+from registry import REGISTRY
+from runner import generate_training_data, run_games
+
+
+def test_no_training_games_writes_nothing(tmp_path):
+    """
+    Generating a data set of zero games returns without merging shards that were never written.
+    """
+    cfg = Config(action_viewer=False, models_dir=tmp_path / "models", data_dir=tmp_path / "data")
+    generate_training_data(cfg, ["RANDOM", "SIMPLE"], ["SIMPLE_2", "RANDOM_2"], 0, 2, 0)
+    assert not binary_existence(cfg)
+    assert not cfg.data_query().exists()
+
+
+def test_seeded_runs_keep_the_learning_of_the_adaptive_model(tmp_path):
+    """
+    A seeded run learns game after game in a single process, and merges the updates of every game across workers, instead of freezing the Adaptive model.
+    """
+    for workers in (1, 2):
+        cfg = Config(action_viewer=False, models_dir=tmp_path / f"models{workers}", data_dir=tmp_path / "data", checkpoint_mode="END", max_num_turns=10)
+        os.makedirs(cfg.models_dir)
+        REGISTRY.clear()
+        try:
+            run_games(cfg, "SIMPLE", "ADAPTIVE", 4, workers, 2, 0)
+            first = REGISTRY.get(cfg, "ADAPTIVE").t_
+            winners, prediction = run_games(cfg, "SIMPLE", "ADAPTIVE", 6, workers, 2, 0, 4)
+            assert len(winners) == 6
+            assert REGISTRY.get(cfg, "ADAPTIVE").t_ == first + sum(prediction) # One update per round played by the Adaptive model
+        finally:
+            REGISTRY.clear()
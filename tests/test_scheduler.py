@@ -0,0 +1,21 @@
+import pytest
+
+from config import Config
+from registry import REGISTRY
+from scheduler import GamePool
+
+
+@pytest.mark.parametrize("cpu_name_p1", ["SIMPLE", "ADAPTIVE"])
+def test_games_reaching_the_turn_limit_are_replaced(tmp_path, cpu_name_p1):
+    """
+    Every game of the series is played, including the games started in place of the ones that ran out of turns.
+    """
+    cfg = Config(action_viewer=False, models_dir=tmp_path / "models", data_dir=tmp_path / "data", checkpoint_mode="OFF", max_num_turns=5)
+    REGISTRY.clear()
+    try:
+        winners, prediction = GamePool(cfg, cpu_name_p1, "ADAPTIVE", 40, 8).run()
+    finally:
+        REGISTRY.clear()
+    assert len(winners) == 40
+    assert None not in winners
+    assert sum(prediction) > 0
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+from stopping import SequentialStop
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "game")
+
+
+def test_sprt_leaves_ties_out():
+    """
+    Ties favour neither player, so a player 2 winning most decisive games of a tie-heavy pairing is found stronger.
+    """
+    stopper = SequentialStop("SPRT", 10000, predicts=False)
+    while not stopper.done():
+        stopper.update([0] * 8 + [2, 2, 1] * 2, [0, 0])
+    assert stopper.reason == "SPRT: player 2 is stronger"
+
+
+def test_ties_alone_never_decide():
+    stopper = SequentialStop("SPRT", 500, predicts=False)
+    stopper.update([0] * 500, [0, 0])
+    assert stopper.done()
+    assert stopper.reason == "every game played"
+
+
+def test_stopping_does_not_load_the_tournament():
+    """
+    The stopping rule stands alone, without the tournament and the modules playing the games.
+    """
+    code = "import sys, stopping; print(sorted(set(sys.modules) & {'tournament', 'computer', 'runner', 'scheduler'}))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=GAME_DIR, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
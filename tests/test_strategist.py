@@ -0,0 +1,21 @@
+import types
+
+import pytest
+
+import strategist
+
+
+def test_failed_linear_program_names_the_state(monkeypatch):
+    """
+    A matrix game the solver fails on stops the solve with the state and rounds remaining, instead of saving an invalid policy.
+    """
+    failure = types.SimpleNamespace(success=False, status=4, message="Numerical difficulties", x=None, fun=None)
+    monkeypatch.setattr(strategist, "linprog", lambda *args, **kwargs: failure)
+    with pytest.raises(strategist.SolverError, match=r"state \(hp1, hp2, mp1, mp2\) = \(\d+, \d+, \d+, \d+\) with 1 rounds remaining"):
+        strategist.solve(2, 1, 3)
+
+
+def test_solved_policy_is_a_distribution():
+    policy = strategist.solve(2, 1, 3)["policy"]
+    alive = policy[1:, 1:, 1:]
+    assert ((alive.sum(axis=-1) - 1) ** 2).max() < 1e-6
@@ -0,0 +1,13 @@
+from config import Config
+from tournament import Tournament
+
+
+def test_results_report_intervals_of_win_and_tie_rates(tmp_path):
+    cfg = Config(action_viewer=False, models_dir=tmp_path / "models", data_dir=tmp_path / "data")
+    tournament = Tournament(cfg, ["RANDOM", "SIMPLE"], 4, path=tmp_path / "tournament.json")
+    tournament.state["pairings"]["RANDOM vs SIMPLE"] = {"p1": "RANDOM", "p2": "SIMPLE", "winners": "1002", "correct_predictions_p2": 0, "incorrect_predictions_p2": 0, "stamps": {}}
+    results = tournament.results()
+    assert results["tie_rate"]["RANDOM"]["SIMPLE"] == 0.5
+    low, high = results["tie_rate_interval"]["RANDOM"]["SIMPLE"]
+    assert low < 0.5 < high
+    assert results["win_rate_p1_interval"]["RANDOM"]["SIMPLE"] != results["tie_rate_interval"]["RANDOM"]["SIMPLE"]
@@ -0,0 +1,29 @@
+import os
+
+import trainer
+from config import Config
+from registry import REGISTRY
+from runner import generate_training_data
+
+
+def test_retraining_scores_only_the_new_held_out_rows(tmp_path, monkeypatch):
+    """
+    An incremental retraining scores the held-out rows added since the last training, and adds them to the held-out counts of the bundle.
+    """
+    cfg = Config(action_viewer=False, models_dir=tmp_path / "models", data_dir=tmp_path / "data", gbc_chunk_size=2000, gbc_chunk_iterations=5)
+    os.makedirs(cfg.models_dir)
+    scored = []
+    held_out_counts = trainer.held_out_counts
+    monkeypatch.setattr(trainer, "held_out_counts", lambda model, features, labels, chunk_size, first_row = 0: scored.append(first_row) or held_out_counts(model, features, labels, chunk_size, first_row))
+    REGISTRY.clear()
+    try:
+        generate_training_data(cfg, ["RANDOM", "SIMPLE"], ["SIMPLE_2", "RANDOM_2"], 100, 1, 0)
+        first = trainer.train_gbc(cfg)
+        generate_training_data(cfg, ["RANDOM", "SIMPLE"], ["SIMPLE_2", "RANDOM_2"], 100, 1, 1)
+        second = trainer.train_gbc(cfg)
+    finally:
+        REGISTRY.clear()
+    assert scored == [0, first["rows"]]
+    assert second["holdout"][1] == int(trainer.holdout_mask(0, second["rows"]).sum())
+    assert second["holdout"][0] >= first["holdout"][0]
+    assert second["accuracy"] == second["holdout"][0] / second["holdout"][1]